@@ -0,0 +1,17 @@
+"""
+SQLite backend whose transactions start with BEGIN IMMEDIATE.
+
+With the default deferred BEGIN, a transaction that reads and then writes
+(like booking a seat) must upgrade its lock mid-way. SQLite answers a
+contended upgrade with "database is locked" straight away, without waiting
+for the busy timeout. Taking the write lock up front makes concurrent bookings
+queue for the timeout instead. Django 5.1 has this built in as
+OPTIONS["transaction_mode"] = "IMMEDIATE".
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute("BEGIN IMMEDIATE")
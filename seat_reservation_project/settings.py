@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -57,6 +60,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'seats_app.profiling.ProfilingMiddleware',  # staff-only, opt-in per request
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -84,11 +88,152 @@ WSGI_APPLICATION = 'seat_reservation_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE=postgres switches to PostgreSQL (needs psycopg), configured by
+# DB_NAME / DB_USER / DB_PASSWORD / DB_HOST / DB_PORT. Connections are kept
+# open for DB_CONN_MAX_AGE seconds and health-checked before reuse.
+# SQLite stays the default; `manage.py copy_sqlite_data` moves its data over.
+
+SQLITE_PATH = os.environ.get('SQLITE_PATH', str(BASE_DIR / 'db.sqlite3'))
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'workspace_plus'),
+            'USER': os.environ.get('DB_USER', 'workspace_plus'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': True,
+        },
+        # Source for `manage.py copy_sqlite_data`
+        'sqlite_source': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': SQLITE_PATH,
+        },
     }
+elif DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            # sqlite3 with BEGIN IMMEDIATE transactions, see the module docstring
+            'ENGINE': 'seat_reservation_project.db_backends.sqlite3',
+            'NAME': SQLITE_PATH,
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '0')),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # Wait for the single writer lock instead of failing at once
+                'timeout': 20,
+            },
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"Unsupported DB_ENGINE {DB_ENGINE!r} (use 'sqlite' or 'postgres')")
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+#
+# Must be shared by every worker process: idempotency records, the seat
+# layout/occupancy caches and the booking-policy generation are invalidated
+# by writing to it. Redis when REDIS_URL is set, else a database table
+# (created by `manage.py migrate`, see migration 0013_cache_table).
+
+REDIS_URL = os.environ.get('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'workspace-plus',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'workspace_plus_cache',
+        }
+    }
+
+# Completed book/cancel responses are replayed for retries carrying the same
+# Idempotency-Key header for this many seconds.
+IDEMPOTENCY_CACHE_ALIAS = 'default'
+IDEMPOTENCY_TTL = 24 * 60 * 60
+
+# Seconds a day's occupancy map / the seat layout stay cached (both are also
+# dropped on change).
+OCCUPANCY_CACHE_TTL = 30
+LAYOUT_CACHE_TTL = 5 * 60
+
+# Preload templates and seat caches in a background thread when a server
+# process starts (see seats_app/warmup.py and `manage.py warm_up`).
+WARMUP_ON_READY = True
+
+# Booking windows are evaluated in this zone (TIME_ZONE below is UTC).
+# Every process re-reads the policy tables' version (row counts and latest
+# updated_at) every POLICY_RECHECK_SECONDS, so edits made elsewhere apply within that time.
+BOOKING_TIME_ZONE = 'Asia/Karachi'
+POLICY_RECHECK_SECONDS = 30
+
+# Reservations not checked in this many minutes after the reservation period
+# starts (or after booking, if later) are released to the waitlist. None turns
+# check-in off. Each server process tracks deadlines in a timer wheel that
+# advances every CHECKIN_WHEEL_TICK seconds, and picks up deadlines set by
+# other processes every CHECKIN_RESYNC_SECONDS (see seats_app/checkin.py).
+CHECKIN_GRACE_MINUTES = 30
+CHECKIN_WHEEL_TICK = 1.0
+CHECKIN_RESYNC_SECONDS = 5
+
+# Standing (recurring) reservations are turned into bookings for this many
+# days ahead by the daily materialise_standing job.
+STANDING_RESERVATION_DAYS_AHEAD = 2
+
+# Seat maps "as of" a past time are replayed from the reservation log, starting
+# at the latest occupancy snapshot. Snapshots are stored every
+# OCCUPANCY_SNAPSHOT_INTERVAL seconds, LAG seconds behind the clock (seats_app/replay.py).
+OCCUPANCY_SNAPSHOT_INTERVAL = 15 * 60
+OCCUPANCY_SNAPSHOT_LAG = 60
+
+# Email notifications are queued in the Notification outbox and sent in
+# batches every NOTIFICATION_DISPATCH_INTERVAL seconds (seats_app/notifications.py).
+# Failed sends are retried after RETRY_BASE, 2×, 4× … seconds.
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '25'))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', '') == '1'
+EMAIL_TIMEOUT = 10
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'Workspace+ <no-reply@nayatel.com>')
+NOTIFICATION_DISPATCH_INTERVAL = 30
+NOTIFICATION_BATCH_SIZE = 100
+NOTIFICATION_MAX_ATTEMPTS = 5
+NOTIFICATION_RETRY_BASE_SECONDS = 60
+
+# (hour, minute) in BOOKING_TIME_ZONE at which the "booking opens soon" reminder is queued
+BOOKING_REMINDER_AT = (8, 15)
+
+# Staff can profile a single request with ?_profile (or ?_profile=sample) or an
+# X-Profile header; reports are listed at /profiles/. See seats_app/profiling.py.
+PROFILING_ENABLED = True
+PROFILING_SAMPLE_INTERVAL = 0.001
+PROFILING_TOP_FUNCTIONS = 40
+PROFILING_KEEP_REPORTS = 200
+
+# Token-bucket limits per API scope, per user and per client IP ("N/period").
+# Use 'seats_app.ratelimit.CacheBackend' with a shared cache to share the
+# buckets between workers.
+RATELIMIT_ENABLED = True
+RATELIMIT_BACKEND = 'seats_app.ratelimit.LocalBackend'
+RATELIMIT_CACHE_ALIAS = 'default'
+RATELIMIT_TRUST_X_FORWARDED_FOR = False
+RATELIMITS = {
+    'book': {'user': '5/10s', 'ip': '60/10s'},
+    'cancel': {'user': '5/10s', 'ip': '60/10s'},
+    'checkin': {'user': '5/10s', 'ip': '60/10s'},
+    'status': {'user': '30/m', 'ip': '600/m'},
 }
 
 
@@ -131,6 +276,26 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATIC_URL = '/seats_app/static/'
 STATICFILES_DIRS = [BASE_DIR / 'seats_app' / 'static']
 
+# Hashed filenames via a manifest, so static files can be cached forever by
+# browsers and by the service worker (run `collectstatic` on deploy).
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'seats_app.storage.PrecacheManifestStaticFilesStorage',
+    },
+}
+
+# Static files the service worker downloads on install and serves cache-first.
+SW_PRECACHE_ASSETS = [
+    'images/workspace-plus-logo.png',
+    'images/workspace-plus-logo.webp',
+    'images/wsp.ico',
+    'images/wsp.png',
+    'manifest.json',
+]
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -1,24 +1,81 @@
 from django.contrib import admin
-from .models import Seat, Reservation,ReservationLog
+from .models import (
+    Seat, Reservation, ReservationLog, BookingWindow, Holiday, WaitlistEntry,
+    StandingReservation, StandingReservationSkip, Notification, OccupancySnapshot,
+)
 
 @admin.register(Seat)
 class SeatAdmin(admin.ModelAdmin):
-    list_display = ('code', 'row', 'col', 'x', 'y', 'is_active')
+    list_display = ('code', 'row', 'col', 'x', 'y', 'zone', 'is_active')
+    list_filter = ('zone', 'is_active')
     search_fields = ('code',)
 
 @admin.register(Reservation)
 class ReservationAdmin(admin.ModelAdmin):
-    list_display = ('user', 'seat', 'date', 'status', 'is_active', 'expires_at')
+    list_display = ('user', 'seat', 'date', 'status', 'is_active', 'checked_in_at', 'expires_at')
     list_filter = ('status', 'date', 'is_active')
+    list_select_related = ('user', 'seat')
 
 
 @admin.register(ReservationLog)
 class ReservationLogAdmin(admin.ModelAdmin):
-    list_display = ('user', 'action', 'timestamp')
-    list_filter = ('timestamp',)
+    list_display = ('user', 'action', 'seat_code', 'date', 'timestamp')
+    list_filter = ('action', 'timestamp')
+    list_select_related = ('user',)
     search_fields = ('user__username', 'seat__code')
 
 
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'seat', 'date', 'status', 'created_at')
+    list_filter = ('status', 'date')
+    list_select_related = ('user', 'seat')
+    search_fields = ('user__username', 'seat__code')
+
+
+@admin.register(StandingReservation)
+class StandingReservationAdmin(admin.ModelAdmin):
+    list_display = ('user', 'seat', 'weekdays', 'start_date', 'end_date', 'is_active')
+    list_filter = ('is_active',)
+    list_select_related = ('user', 'seat')
+    search_fields = ('user__username', 'seat__code')
+
+
+@admin.register(StandingReservationSkip)
+class StandingReservationSkipAdmin(admin.ModelAdmin):
+    list_display = ('standing', 'date', 'reason', 'created_at')
+    list_filter = ('reason', 'date')
+    list_select_related = ('standing__user', 'standing__seat')
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('to_email', 'kind', 'status', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('to_email', 'user__username')
+    readonly_fields = ('last_error',)
+
+
+@admin.register(OccupancySnapshot)
+class OccupancySnapshotAdmin(admin.ModelAdmin):
+    list_display = ('date', 'taken_at', 'events', 'created_at')
+    date_hierarchy = 'date'
+    exclude = ('occupancy',)
+
+
+@admin.register(BookingWindow)
+class BookingWindowAdmin(admin.ModelAdmin):
+    list_display = ('zone', 'weekday', 'booking_open', 'booking_close', 'reservation_start', 'reservation_end', 'is_active')
+    list_filter = ('zone', 'weekday', 'is_active')
+
+
+@admin.register(Holiday)
+class HolidayAdmin(admin.ModelAdmin):
+    list_display = ('date', 'zone', 'name')
+    list_filter = ('zone',)
+    date_hierarchy = 'date'
+
+
 admin.site.site_header = "Workspace+ Admin"
 admin.site.site_title = "Workspace+ Admin"
 admin.site.index_title = "Welcome to Workspace+ Admin"
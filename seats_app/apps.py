@@ -1,12 +1,50 @@
 from django.apps import AppConfig
+from django.conf import settings
 import os
+import sys
+
+# Executables that run the app as a web server
+SERVER_COMMANDS = {"gunicorn", "uvicorn", "daphne", "hypercorn", "uwsgi"}
+
 
 class SeatsAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'seats_app'
 
     def ready(self):
+        from . import seat_cache  # noqa: F401  (connects cache invalidation signals)
+
         # Prevent multiple threads during development auto-reload
         if os.environ.get("RUN_MAIN") == "true":
-            from utils.scheduler import start_daily_scheduler
+            from utils.scheduler import start_daily_scheduler, start_interval_scheduler
             start_daily_scheduler(hour=18, minute=0)  # run daily at 6 PM
+            # Book the next days for standing reservations once today's seats are freed
+            start_daily_scheduler(hour=18, minute=5, command="materialise_standing")
+            # Email: queue the morning reminder, and drain the outbox
+            hour, minute = settings.BOOKING_REMINDER_AT
+            start_daily_scheduler(hour=hour, minute=minute, command="send_booking_reminders")
+            start_interval_scheduler(settings.NOTIFICATION_DISPATCH_INTERVAL, "dispatch_notifications")
+            # Checkpoints for point-in-time seat maps
+            start_interval_scheduler(settings.OCCUPANCY_SNAPSHOT_INTERVAL, "snapshot_occupancy")
+
+        if getattr(settings, "WARMUP_ON_READY", False) and self._is_serving():
+            # Off the startup path: Django discourages queries inside ready().
+            from .warmup import start_background_warm_up
+            start_background_warm_up()
+
+        if self._is_serving():
+            # Releases reservations nobody checked in to (no-op when check-in is off)
+            from .checkin import start_release_thread
+            start_release_thread()
+
+    @staticmethod
+    def _is_serving():
+        """
+        True in runserver's child or under a known WSGI/ASGI server; not in
+        tests, shells or other commands. Set SEATS_SERVING=1 for other servers.
+        """
+        if os.environ.get("SEATS_SERVING") == "1":
+            return True
+        if sys.argv[1:2] == ["runserver"]:
+            return os.environ.get("RUN_MAIN") == "true"
+        return os.path.basename(sys.argv[0]) in SERVER_COMMANDS or "uwsgi" in sys.modules
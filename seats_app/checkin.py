@@ -0,0 +1,186 @@
+"""
+Check-in and release of no-show seats.
+
+A reservation must be checked in within CHECKIN_GRACE_MINUTES of the
+reservation period starting (or of being booked, if that is later). Otherwise
+the seat is released and handed to the first person on its waitlist.
+
+Every serving process keeps the pending deadlines in a TimerWheel. The wheel
+is loaded from the database when the process starts, and bookings made in the
+process are added to it. A background thread advances the wheel once per
+tick. Deadlines created by other processes (other workers, the admin,
+materialise_standing) are not in this wheel, so every CHECKIN_RESYNC_SECONDS
+the thread also asks the check-in-due index for anything overdue (one indexed
+query). Each due reservation is released with one conditional UPDATE. The
+UPDATE only matches a reservation that is still active, not checked in and
+past its deadline. That makes check-ins, cancellations and other processes
+releasing the same row harmless. The freed seat's cached occupancy is dropped
+from the shared cache, so every worker shows it at once.
+"""
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Reservation, ReservationLog
+from .policy import reservation_start
+from .seat_cache import invalidate_occupancy
+from .timerwheel import TimerWheel
+
+_wheel = None
+_wheel_lock = threading.Lock()
+
+
+def grace():
+    """The check-in grace period, or None when check-in is not required."""
+    minutes = getattr(settings, 'CHECKIN_GRACE_MINUTES', None)
+    return None if minutes is None else timedelta(minutes=minutes)
+
+
+def checkin_deadline(day, zone='', booked_at=None):
+    """When a reservation for `day` booked at `booked_at` is released unless checked in (None: never)."""
+    period = grace()
+    if period is None:
+        return None
+    starts = reservation_start(day, zone)
+    booked_at = booked_at or timezone.now()
+    return max(starts, booked_at) + period
+
+
+def track(reservation):
+    """Arm the release timer for `reservation` once the current transaction commits."""
+    wheel = _wheel
+    if wheel is None or reservation.checkin_deadline is None:
+        return
+    transaction.on_commit(
+        lambda: wheel.schedule(reservation.pk, reservation.checkin_deadline.timestamp())
+    )
+
+
+def check_in(reservation, now=None):
+    """Record that the holder arrived. Returns False if the deadline has already passed."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        checked_in = (
+            Reservation.objects
+            .filter(pk=reservation.pk, status='active', checked_in_at__isnull=True)
+            .exclude(checkin_deadline__lte=now)
+            .update(checked_in_at=now)
+        )
+        if not checked_in:
+            return False
+        reservation.checked_in_at = now
+        ReservationLog.record(reservation, 'checked_in', now)
+    if _wheel is not None:
+        _wheel.cancel(reservation.pk)
+    return True
+
+
+def release_no_show(reservation_id, now=None):
+    """Release one reservation whose check-in deadline has passed. Returns whether it was released."""
+    from .notifications import enqueue
+    from .waitlist import promote_next
+
+    now = now or timezone.now()
+    with transaction.atomic():
+        released = Reservation.objects.filter(
+            pk=reservation_id,
+            status='active',
+            checked_in_at__isnull=True,
+            checkin_deadline__lte=now,
+        ).update(status='released', is_active=False)
+        if not released:
+            return False
+
+        reservation = Reservation.objects.select_related('seat', 'user').get(pk=reservation_id)
+        ReservationLog.record(reservation, 'released', now)
+        enqueue(reservation.user, 'released', reservation)
+        promote_next(reservation.seat, reservation.date, now)
+        # update() sends no post_save, so drop the cached occupancy ourselves
+        transaction.on_commit(lambda: invalidate_occupancy(reservation.date))
+    return True
+
+
+def overdue(now=None):
+    """Ids of reservations past their check-in deadline (uses reservation_checkin_due_idx)."""
+    now = now or timezone.now()
+    return list(
+        Reservation.objects
+        .filter(status='active', checked_in_at__isnull=True, checkin_deadline__lte=now)
+        .order_by('checkin_deadline')
+        .values_list('id', flat=True)
+    )
+
+
+def _load_pending(wheel):
+    pending = (
+        Reservation.objects
+        .filter(status='active', checked_in_at__isnull=True, checkin_deadline__isnull=False)
+        .values_list('id', 'checkin_deadline')
+    )
+    count = 0
+    for reservation_id, deadline in pending.iterator():
+        wheel.schedule(reservation_id, deadline.timestamp())
+        count += 1
+    return count
+
+
+def _run(wheel, tick, resync):
+    try:
+        print(f"[Check-in] Tracking {_load_pending(wheel)} pending check-in deadlines")
+    except DatabaseError as e:
+        print(f"[Check-in Error] Could not load deadlines: {e}")
+    finally:
+        close_old_connections()
+
+    next_resync = time.monotonic() + resync
+    while True:
+        time.sleep(tick)
+        resyncing = time.monotonic() >= next_resync
+        if resyncing:
+            next_resync = time.monotonic() + resync
+        for reservation_id in release_due(wheel, resync=resyncing):
+            print(f"[Check-in] Released reservation {reservation_id} (no check-in)")
+        close_old_connections()
+
+
+def release_due(wheel, now=None, resync=False):
+    """
+    Release the reservations `wheel` has due at `now`. With `resync`, also
+    those overdue that it was never told about. Returns the released ids.
+    """
+    now = now or timezone.now()
+    due = wheel.advance(now.timestamp())
+    if resync:
+        # Deadlines set in other processes (or armed in no wheel at all)
+        try:
+            due = list(dict.fromkeys(due + overdue(now)))
+        except DatabaseError as e:
+            print(f"[Check-in Error] Could not check for overdue reservations: {e}")
+    released = []
+    for reservation_id in due:
+        try:
+            if release_no_show(reservation_id, now):
+                released.append(reservation_id)
+        except Exception as e:
+            print(f"[Check-in Error] Reservation {reservation_id}: {e}")
+    return released
+
+
+def start_release_thread():
+    """Start this process's timer wheel and its release thread (once)."""
+    global _wheel
+    if grace() is None:
+        return None
+    tick = getattr(settings, 'CHECKIN_WHEEL_TICK', 1.0)
+    resync = getattr(settings, 'CHECKIN_RESYNC_SECONDS', 5)
+    with _wheel_lock:
+        if _wheel is not None:
+            return _wheel
+        _wheel = TimerWheel(now=timezone.now().timestamp(), tick=tick)
+    thread = threading.Thread(target=_run, args=(_wheel, tick, resync), name='checkin-release', daemon=True)
+    thread.start()
+    return _wheel
@@ -0,0 +1,119 @@
+"""
+Idempotency-Key support for the booking APIs.
+
+A client sends the same ``Idempotency-Key`` header when it retries a request.
+The first completed response is stored in the cache for IDEMPOTENCY_TTL
+seconds and every retry is answered from there, without running the view
+(and without touching the reservation tables) again. A hash of the request
+body is stored with it; reusing a key for a different body gets a 422.
+
+Server errors and responses carrying Retry-After (the request was not
+carried out and can be sent again, e.g. a seat locked by a concurrent
+booking) are not stored.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, JsonResponse
+
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+REPLAY_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+
+
+def _cache():
+    return caches[getattr(settings, 'IDEMPOTENCY_CACHE_ALIAS', 'default')]
+
+
+def _ttl():
+    return getattr(settings, 'IDEMPOTENCY_TTL', 24 * 60 * 60)
+
+
+def _cache_key(request, key):
+    # Keys are scoped per user and endpoint so two users can't collide.
+    digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+    return f"idem:{request.user.pk}:{request.path}:{digest}"
+
+
+def _fingerprint(request):
+    return hashlib.sha256(request.body).hexdigest()
+
+
+def _replay(stored):
+    response = HttpResponse(
+        stored['content'],
+        status=stored['status'],
+        content_type=stored['content_type'],
+    )
+    response[REPLAY_HEADER] = 'true'
+    return response
+
+
+def idempotent(view_func):
+    """
+    Replay the stored response for a repeated Idempotency-Key.
+
+    Requests without the header (or from anonymous users) go straight to the
+    view. Only completed responses (status < 500, no Retry-After) are
+    stored; anything else releases the key so the client can retry for real.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        key = request.META.get(IDEMPOTENCY_HEADER, '').strip()
+        if not key or not request.user.is_authenticated:
+            return view_func(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return JsonResponse({'ok': False, 'error': 'Idempotency-Key is too long.'}, status=400)
+
+        cache = _cache()
+        cache_key = _cache_key(request, key)
+        fingerprint = _fingerprint(request)
+        # Stored while the first request with the key is still running
+        in_flight = {'fingerprint': fingerprint, 'in_flight': True}
+
+        # cache.add() only succeeds for the first request, so concurrent
+        # duplicates can't both run the view.
+        if not cache.add(cache_key, in_flight, _ttl()):
+            stored = cache.get(cache_key)
+            if stored is not None and stored['fingerprint'] != fingerprint:
+                return JsonResponse(
+                    {'ok': False, 'error': 'This Idempotency-Key was already used for a different request.'},
+                    status=422,
+                )
+            if stored is not None and stored.get('in_flight'):
+                response = JsonResponse(
+                    {'ok': False, 'error': 'A request with this Idempotency-Key is still in progress.'},
+                    status=409,
+                )
+                response['Retry-After'] = '1'
+                return response
+            if stored is not None:
+                return _replay(stored)
+            # Entry expired between add() and get(): claim it again.
+            cache.set(cache_key, in_flight, _ttl())
+
+        try:
+            response = view_func(request, *args, **kwargs)
+        except Exception:
+            cache.delete(cache_key)
+            raise
+
+        if (
+            response.status_code >= 500
+            or response.has_header('Retry-After')
+            or getattr(response, 'streaming', False)
+        ):
+            cache.delete(cache_key)
+        else:
+            cache.set(cache_key, {
+                'fingerprint': fingerprint,
+                'status': response.status_code,
+                'content': response.content,
+                'content_type': response.get('Content-Type', 'application/json'),
+            }, _ttl())
+        return response
+
+    return wrapper
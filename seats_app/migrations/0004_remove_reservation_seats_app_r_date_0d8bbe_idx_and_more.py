@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2025-10-21 10:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seats_app', '0003_reservationlog_seat_code_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='reservation',
+            name='seats_app_r_date_0d8bbe_idx',
+        ),
+        migrations.AlterUniqueTogether(
+            name='reservation',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='status',
+            field=models.CharField(choices=[('active', 'Active'), ('expired', 'Expired'), ('cancelled', 'Cancelled')], default='active', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='reservation',
+            name='expires_at',
+            field=models.DateTimeField(),
+        ),
+        migrations.AlterField(
+            model_name='reservation',
+            name='seat',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='seats_app.seat'),
+        ),
+        migrations.AlterField(
+            model_name='reservation',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.4 on 2026-10-19 15:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seats_app', '0004_remove_reservation_seats_app_r_date_0d8bbe_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingWindow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zone', models.CharField(blank=True, help_text='Leave empty for all zones', max_length=50)),
+                ('weekday', models.PositiveSmallIntegerField(blank=True, choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')], help_text='Leave empty for every day', null=True)),
+                ('booking_open', models.TimeField()),
+                ('booking_close', models.TimeField()),
+                ('reservation_start', models.TimeField()),
+                ('reservation_end', models.TimeField()),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Holiday',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('zone', models.CharField(blank=True, help_text='Leave empty for all zones', max_length=50)),
+                ('name', models.CharField(blank=True, max_length=100)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='seat',
+            name='zone',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddConstraint(
+            model_name='holiday',
+            constraint=models.UniqueConstraint(fields=('date', 'zone'), name='unique_holiday_date_zone'),
+        ),
+        migrations.AddConstraint(
+            model_name='bookingwindow',
+            constraint=models.UniqueConstraint(fields=('zone', 'weekday'), name='unique_booking_window_zone_weekday'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.4 on 2026-10-19 16:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seats_app', '0005_booking_policy'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='reservation',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'active')), fields=('seat', 'date'), name='unique_active_reservation_per_seat_day'),
+        ),
+        migrations.AddConstraint(
+            model_name='reservation',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'active')), fields=('user', 'date'), name='unique_active_reservation_per_user_day'),
+        ),
+    ]
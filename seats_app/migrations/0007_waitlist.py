@@ -0,0 +1,41 @@
+# Generated by Django 4.2.4 on 2026-10-19 16:07
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('seats_app', '0006_reservation_active_constraints'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reservationlog',
+            name='action',
+            field=models.CharField(choices=[('created', 'Created'), ('expired', 'Expired'), ('cancelled', 'Cancelled'), ('promoted', 'Promoted from waitlist')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('promoted', 'Promoted'), ('left', 'Left'), ('skipped', 'Skipped')], default='waiting', max_length=20)),
+                ('reservation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='seats_app.reservation')),
+                ('seat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist', to='seats_app.seat')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'waiting')), fields=['seat', 'date', 'created_at', 'id'], name='waitlist_head_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='waitlistentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'waiting')), fields=('seat', 'date', 'user'), name='unique_waiting_entry_per_seat_day_user'),
+        ),
+    ]
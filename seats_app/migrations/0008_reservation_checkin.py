@@ -0,0 +1,37 @@
+# Generated by Django 4.2.4 on 2026-10-19 16:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seats_app', '0007_waitlist'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='checked_in_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='checkin_deadline',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='reservation',
+            name='status',
+            field=models.CharField(choices=[('active', 'Active'), ('expired', 'Expired'), ('cancelled', 'Cancelled'), ('released', 'Released (no check-in)')], default='active', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='reservationlog',
+            name='action',
+            field=models.CharField(choices=[('created', 'Created'), ('expired', 'Expired'), ('cancelled', 'Cancelled'), ('promoted', 'Promoted from waitlist'), ('checked_in', 'Checked in'), ('released', 'Released (no check-in)')], max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(condition=models.Q(('checked_in_at__isnull', True), ('status', 'active')), fields=['checkin_deadline'], name='reservation_checkin_due_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.4 on 2026-10-19 16:13
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('seats_app', '0008_reservation_checkin'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StandingReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekdays', models.CharField(help_text='Weekday digits, Monday=0 … Sunday=6; e.g. 0123 for Monday to Thursday', max_length=7, validators=[django.core.validators.RegexValidator('^[0-6]{1,7}$', 'Use weekday digits, Monday=0 … Sunday=6.')])),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField(blank=True, help_text='Leave empty to keep it going', null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('seat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standing_reservations', to='seats_app.seat')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standing_reservations', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StandingReservationSkip',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('reason', models.CharField(choices=[('seat_taken', 'Seat already reserved'), ('user_booked', 'User already has a reservation'), ('seat_unavailable', 'Seat inactive or not reservable')], max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('standing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skips', to='seats_app.standingreservation')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='standing',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reservations', to='seats_app.standingreservation'),
+        ),
+        migrations.AddConstraint(
+            model_name='standingreservationskip',
+            constraint=models.UniqueConstraint(fields=('standing', 'date'), name='unique_standing_skip_per_day'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.4 on 2026-10-19 16:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seats_app', '0011_profile_report'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OccupancySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('taken_at', models.DateTimeField()),
+                ('occupancy', models.JSONField(default=list)),
+                ('events', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='reservationlog',
+            name='date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='reservationlog',
+            name='seat',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='seats_app.seat'),
+        ),
+        migrations.AddIndex(
+            model_name='reservationlog',
+            index=models.Index(fields=['date', 'timestamp'], name='reservationlog_date_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservationlog',
+            index=models.Index(fields=['timestamp'], name='reservationlog_ts_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='occupancysnapshot',
+            constraint=models.UniqueConstraint(fields=('date', 'taken_at'), name='unique_occupancy_snapshot'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.4 on 2026-10-19 16:36
+
+from django.db import migrations, models
+
+
+def drop_duplicate_every_day_windows(apps, schema_editor):
+    # compile_policy() let the row with the highest id win; keep only that one
+    BookingWindow = apps.get_model('seats_app', 'BookingWindow')
+    keep = {}
+    for row in BookingWindow.objects.filter(weekday__isnull=True).order_by('id'):
+        keep[row.zone] = row.id
+    BookingWindow.objects.filter(weekday__isnull=True).exclude(id__in=keep.values()).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seats_app', '0013_cache_table'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookingwindow',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='holiday',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(drop_duplicate_every_day_windows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='bookingwindow',
+            constraint=models.UniqueConstraint(condition=models.Q(('weekday__isnull', True)), fields=('zone',), name='unique_booking_window_zone_every_day'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.4 on 2026-10-19 16:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seats_app', '0014_policy_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='occupancysnapshot',
+            name='last_log_id',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.core.validators import RegexValidator
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
@@ -17,6 +18,7 @@ class Seat(models.Model):
     y = models.IntegerField(null=True, blank=True)
     is_active = models.BooleanField(default=True)  # physically exists/usable
     is_reservable = models.BooleanField(default=True)  # can this seat be booked or not
+    zone = models.CharField(max_length=50, blank=True)  # e.g. "North Wing"; used by booking policies
 
     def __str__(self):
         return self.code
@@ -28,6 +30,7 @@ class Reservation(models.Model):
         ('active', 'Active'),
         ('expired', 'Expired'),
         ('cancelled', 'Cancelled'),
+        ('released', 'Released (no check-in)'),
     ]
 
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -37,19 +40,48 @@ class Reservation(models.Model):
     expires_at = models.DateTimeField()
     is_active = models.BooleanField(default=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
+    checked_in_at = models.DateTimeField(null=True, blank=True)
+    # Released for someone else if not checked in by then (see seats_app/checkin.py)
+    checkin_deadline = models.DateTimeField(null=True, blank=True)
+    # Set when the row was materialised from a standing reservation
+    standing = models.ForeignKey(
+        'StandingReservation', on_delete=models.SET_NULL, null=True, blank=True, related_name='reservations'
+    )
+
+    class Meta:
+        indexes = [
+            # Reservations still waiting for a check-in, by deadline
+            models.Index(
+                fields=['checkin_deadline'],
+                condition=models.Q(status='active', checked_in_at__isnull=True),
+                name='reservation_checkin_due_idx',
+            ),
+        ]
+        constraints = [
+            # Last line of defence against double booking under concurrency
+            models.UniqueConstraint(
+                fields=['seat', 'date'], condition=models.Q(status='active'),
+                name='unique_active_reservation_per_seat_day',
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'date'], condition=models.Q(status='active'),
+                name='unique_active_reservation_per_user_day',
+            ),
+        ]
 
     def expire(self):
-        """Mark reservation as expired and log it."""
+        """Mark reservation as expired, log it and hand the seat to the next waiter."""
+        from .notifications import enqueue
+        from .waitlist import promote_next
+
         if self.is_active:
-            self.is_active = False
-            self.status = 'expired'
-            self.save(update_fields=['is_active', 'status'])
-            ReservationLog.objects.create(
-                reservation=self,
-                user=self.user,
-                action='expired',
-                timestamp=timezone.now()
-            )
+            with transaction.atomic():
+                self.is_active = False
+                self.status = 'expired'
+                self.save(update_fields=['is_active', 'status'])
+                ReservationLog.record(self, 'expired')
+                enqueue(self.user, 'expired', self)
+                promote_next(self.seat, self.date)
 
     def __str__(self):
         return f"{self.user.username} - {self.seat.code} ({self.status})"
@@ -59,11 +91,18 @@ class ReservationLog(models.Model):
     """
     Tracks when a reservation was made, cancelled, or expired.
     Remains even if the reservation is deleted.
+
+    Every row carries the seat and the reservation date, so the log is an
+    event stream the seat map can be replayed from (see seats_app/replay.py).
+    Write rows with record() / build() so those are always filled in.
     """
     ACTION_CHOICES = [
         ('created', 'Created'),
         ('expired', 'Expired'),
         ('cancelled', 'Cancelled'),
+        ('promoted', 'Promoted from waitlist'),
+        ('checked_in', 'Checked in'),
+        ('released', 'Released (no check-in)'),
     ]
 
     reservation = models.ForeignKey(
@@ -74,9 +113,298 @@ class ReservationLog(models.Model):
         related_name='logs'
     )
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    seat = models.ForeignKey(Seat, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
     seat_code = models.CharField(max_length=50)  # 👈 snapshot of seat at time of log
+    date = models.DateField(null=True, blank=True)  # the reservation's day
     action = models.CharField(max_length=20, choices=ACTION_CHOICES)
     timestamp = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            # Replaying one day's events in order
+            models.Index(fields=['date', 'timestamp'], name='reservationlog_date_ts_idx'),
+            models.Index(fields=['timestamp'], name='reservationlog_ts_idx'),
+        ]
+
+    @classmethod
+    def build(cls, reservation, action, timestamp=None, user_id=None):
+        """An unsaved log row for `reservation` with its seat, seat code and date filled in."""
+        return cls(
+            reservation=reservation,
+            user_id=user_id if user_id is not None else reservation.user_id,
+            seat_id=reservation.seat_id,
+            seat_code=reservation.seat.code,
+            date=reservation.date,
+            action=action,
+            timestamp=timestamp or timezone.now(),
+        )
+
+    @classmethod
+    def record(cls, reservation, action, timestamp=None, user_id=None):
+        log = cls.build(reservation, action, timestamp, user_id)
+        log.save()
+        return log
+
     def __str__(self):
         return f"{self.seat_code} - {self.action} by {self.user or 'Unknown'}"
+
+
+
+WEEKDAY_CHOICES = [
+    (0, 'Monday'),
+    (1, 'Tuesday'),
+    (2, 'Wednesday'),
+    (3, 'Thursday'),
+    (4, 'Friday'),
+    (5, 'Saturday'),
+    (6, 'Sunday'),
+]
+
+
+class PolicyQuerySet(models.QuerySet):
+    """
+    QuerySet.update() skips auto_now, so stamp updated_at here as well:
+    bulk edits then still change the policy version (see policy.py).
+    """
+
+    def update(self, **kwargs):
+        kwargs.setdefault('updated_at', timezone.now())
+        return super().update(**kwargs)
+
+
+class BookingWindow(models.Model):
+    """
+    Booking and reservation hours. A row applies to one weekday (or every day
+    when weekday is empty) and one zone (or every zone when zone is empty);
+    the most specific active row wins. See seats_app/policy.py.
+    """
+    zone = models.CharField(max_length=50, blank=True, help_text="Leave empty for all zones")
+    weekday = models.PositiveSmallIntegerField(
+        choices=WEEKDAY_CHOICES, null=True, blank=True, help_text="Leave empty for every day"
+    )
+    booking_open = models.TimeField()
+    booking_close = models.TimeField()
+    reservation_start = models.TimeField()
+    reservation_end = models.TimeField()
+    is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)  # part of the policy version, see policy.py
+
+    objects = PolicyQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['zone', 'weekday'], name='unique_booking_window_zone_weekday'),
+            # NULLs are distinct in the constraint above, so "every day" rows need their own
+            models.UniqueConstraint(
+                fields=['zone'], condition=models.Q(weekday__isnull=True),
+                name='unique_booking_window_zone_every_day',
+            ),
+        ]
+
+    def __str__(self):
+        day = self.get_weekday_display() if self.weekday is not None else 'Every day'
+        return f"{self.zone or 'All zones'} / {day}: {self.booking_open}–{self.booking_close}"
+
+
+class Holiday(models.Model):
+    """No booking on this date (for one zone, or all zones when zone is empty)."""
+    date = models.DateField()
+    zone = models.CharField(max_length=50, blank=True, help_text="Leave empty for all zones")
+    name = models.CharField(max_length=100, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = PolicyQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'zone'], name='unique_holiday_date_zone'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.name}".strip()
+
+
+class WaitlistEntry(models.Model):
+    """
+    A user queued for a seat on a date. When the seat is released (cancel or
+    expiry) the oldest waiting entry is turned into a Reservation in the same
+    transaction; see seats_app/waitlist.py.
+    """
+    STATUS_CHOICES = [
+        ('waiting', 'Waiting'),
+        ('promoted', 'Promoted'),
+        ('left', 'Left'),
+        ('skipped', 'Skipped'),  # already had a seat when their turn came
+    ]
+
+    seat = models.ForeignKey(Seat, on_delete=models.CASCADE, related_name='waitlist')
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    date = models.DateField()
+    created_at = models.DateTimeField(default=timezone.now)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='waiting')
+    reservation = models.ForeignKey(Reservation, on_delete=models.SET_NULL, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Head-of-queue lookup: waiting entries for a seat/day in arrival order
+            models.Index(
+                fields=['seat', 'date', 'created_at', 'id'],
+                condition=models.Q(status='waiting'),
+                name='waitlist_head_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['seat', 'date', 'user'], condition=models.Q(status='waiting'),
+                name='unique_waiting_entry_per_seat_day_user',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} waiting for {self.seat} on {self.date} ({self.status})"
+
+
+class StandingReservation(models.Model):
+    """
+    A user's recurring booking of a seat on some weekdays, e.g. Monday to
+    Thursday. The materialise_standing job turns it into ordinary Reservation
+    rows a few days ahead; see seats_app/standing.py.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='standing_reservations')
+    seat = models.ForeignKey(Seat, on_delete=models.CASCADE, related_name='standing_reservations')
+    weekdays = models.CharField(
+        max_length=7,
+        validators=[RegexValidator(r'^[0-6]{1,7}$', "Use weekday digits, Monday=0 … Sunday=6.")],
+        help_text="Weekday digits, Monday=0 … Sunday=6; e.g. 0123 for Monday to Thursday",
+    )
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True, help_text="Leave empty to keep it going")
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def weekday_set(self):
+        return {int(d) for d in self.weekdays}
+
+    def applies_to(self, day):
+        return (
+            day.weekday() in self.weekday_set()
+            and self.start_date <= day
+            and (self.end_date is None or day <= self.end_date)
+        )
+
+    def __str__(self):
+        return f"{self.user} - {self.seat} every {self.weekdays}"
+
+
+class StandingReservationSkip(models.Model):
+    """A date on which a standing reservation could not be materialised, and why."""
+    REASON_CHOICES = [
+        ('seat_taken', 'Seat already reserved'),
+        ('user_booked', 'User already has a reservation'),
+        ('seat_unavailable', 'Seat inactive or not reservable'),
+    ]
+
+    standing = models.ForeignKey(StandingReservation, on_delete=models.CASCADE, related_name='skips')
+    date = models.DateField()
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['standing', 'date'], name='unique_standing_skip_per_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.standing} skipped {self.date} ({self.reason})"
+
+
+class Notification(models.Model):
+    """
+    Outbox of emails to users. Rows are written in the same transaction as
+    the reservation change they announce and sent later, in batches, by
+    `manage.py dispatch_notifications`; see seats_app/notifications.py.
+    """
+    KIND_CHOICES = [
+        ('reminder', 'Booking reminder'),
+        ('cancelled', 'Reservation cancelled'),
+        ('expired', 'Reservation expired'),
+        ('released', 'Released (no check-in)'),
+        ('promoted', 'Promoted from waitlist'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),  # gave up after NOTIFICATION_MAX_ATTEMPTS
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    reservation = models.ForeignKey(Reservation, on_delete=models.SET_NULL, null=True, blank=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=200)
+    body = models.TextField()
+    # e.g. "reminder:2025-01-06:42"; stops the same notice being queued twice
+    dedupe_key = models.CharField(max_length=100, null=True, blank=True, unique=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The dispatcher's queue: pending rows that are due
+            models.Index(
+                fields=['next_attempt_at', 'id'],
+                condition=models.Q(status='pending'),
+                name='notification_due_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} to {self.to_email} ({self.status})"
+
+
+class ProfileReport(models.Model):
+    """A staff-requested profile of one request; see seats_app/profiling.py."""
+    MODE_CHOICES = [
+        ('cprofile', 'cProfile'),
+        ('sample', 'Sampling'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    mode = models.CharField(max_length=10, choices=MODE_CHOICES)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    sql_count = models.PositiveIntegerField()
+    sql_ms = models.FloatField()
+    profile = models.TextField()  # pstats / sample summary text
+    queries = models.JSONField(default=list)  # [{sql, ms, origin}, ...]
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
+
+
+class OccupancySnapshot(models.Model):
+    """
+    Who held which seat on `date`, after every ReservationLog event for that
+    day up to `taken_at`. Replays start from the nearest one; see seats_app/replay.py.
+    """
+    date = models.DateField()
+    taken_at = models.DateTimeField()
+    occupancy = models.JSONField(default=list)  # [[seat_id, reservation_id, user_id], ...]
+    events = models.PositiveIntegerField(default=0)  # log rows replayed since the previous snapshot
+    last_log_id = models.PositiveBigIntegerField(default=0)  # highest log id of the day when it was taken
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'taken_at'], name='unique_occupancy_snapshot'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} as of {self.taken_at:%Y-%m-%d %H:%M}"
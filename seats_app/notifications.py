@@ -0,0 +1,193 @@
+"""
+Email notifications through an outbox table.
+
+Write paths (cancel, expiry, no-show release, waitlist promotion) call
+enqueue() inside their own transaction: one INSERT, and nothing is queued if
+the change rolls back. The booking reminder is queued for every user without
+a seat by enqueue_reminders() in one bulk insert.
+
+dispatch() drains the outbox in batches of NOTIFICATION_BATCH_SIZE over one
+mail connection (settings.EMAIL_BACKEND; the console or locmem backends work
+for development and tests). Each batch is claimed in a short transaction by
+pushing its next_attempt_at out by a lease, and sent outside any transaction.
+Concurrent dispatchers therefore skip each other's rows, and bookings are not
+blocked while mail goes out. A failed send is unsent with exponential
+backoff until NOTIFICATION_MAX_ATTEMPTS, then marked failed.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.formats import date_format, time_format
+
+from .models import Notification, Reservation
+from .policy import get_policy, window_for
+
+LEASE = timedelta(minutes=5)
+
+MESSAGES = {
+    'reminder': (
+        "Seat booking opens at {opens}",
+        "Hi {username},\n\nBooking for {date} opens at {opens} and closes at {closes}. "
+        "Book your seat on Workspace+ before it closes.\n",
+    ),
+    'cancelled': (
+        "Reservation cancelled: seat {seat}",
+        "Hi {username},\n\nYour reservation of seat {seat} on {date} has been cancelled.\n",
+    ),
+    'expired': (
+        "Reservation ended: seat {seat}",
+        "Hi {username},\n\nYour reservation of seat {seat} on {date} ended at {time}.\n",
+    ),
+    'released': (
+        "Seat {seat} released (no check-in)",
+        "Hi {username},\n\nYou did not check in to seat {seat} on {date} by {time}, "
+        "so it has been released for someone else.\n",
+    ),
+    'promoted': (
+        "You got seat {seat}",
+        "Hi {username},\n\nSeat {seat} on {date} was freed and is now booked for you "
+        "from the waitlist. Please check in by {time}.\n",
+    ),
+}
+
+
+def _local_time(value):
+    return time_format(timezone.localtime(value, get_policy().tz).time(), "g:i A") if value else ''
+
+
+def _reservation_context(reservation):
+    context = {
+        'seat': reservation.seat.code,
+        'date': date_format(reservation.date, "l, j F"),
+        'time': _local_time(reservation.expires_at),
+    }
+    if reservation.status in ('active', 'released') and reservation.checkin_deadline:
+        context['time'] = _local_time(reservation.checkin_deadline)
+    return context
+
+
+def _build(user, kind, context, **fields):
+    subject, body = MESSAGES[kind]
+    context = {'username': user.get_username(), **context}
+    now = timezone.now()
+    return Notification(
+        user=user, kind=kind, to_email=user.email,
+        subject=subject.format(**context), body=body.format(**context),
+        created_at=now, next_attempt_at=now, **fields,
+    )
+
+
+def enqueue(user, kind, reservation=None):
+    """Queue a notice about `reservation` for `user` (in the caller's transaction). Skips users without email."""
+    if not user.email:
+        return None
+    context = _reservation_context(reservation) if reservation else {}
+    notification = _build(user, kind, context, reservation=reservation)
+    notification.save()
+    return notification
+
+
+def enqueue_reminders(day):
+    """
+    Queue "booking opens at …" for everyone with an email and no seat on `day`.
+    Safe to run twice; returns the number of reminders newly queued.
+    """
+    window = window_for(day)
+    if window is None:
+        return 0  # holiday
+    context = {
+        'date': date_format(day, "l, j F"),
+        'opens': time_format(window['booking_open'], "g:i A"),
+        'closes': time_format(window['booking_close'], "g:i A"),
+    }
+    booked = Reservation.objects.filter(date=day, status='active').values('user_id')
+    # Already queued by an earlier run, so the count is of new reminders only
+    reminded = Notification.objects.filter(
+        kind='reminder', dedupe_key__startswith=f"reminder:{day.isoformat()}:",
+    ).values('user_id')
+    users = (
+        get_user_model().objects.filter(is_active=True).exclude(email='')
+        .exclude(pk__in=booked).exclude(pk__in=reminded)
+    )
+    notifications = [
+        _build(user, 'reminder', context, dedupe_key=f"reminder:{day.isoformat()}:{user.pk}")
+        for user in users.only('pk', 'username', 'email').iterator()
+    ]
+    Notification.objects.bulk_create(notifications, batch_size=1000, ignore_conflicts=True)
+    return len(notifications)
+
+
+def _backoff(attempts):
+    base = getattr(settings, 'NOTIFICATION_RETRY_BASE_SECONDS', 60)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), 6 * 60 * 60))
+
+
+def _claim(batch_size, now):
+    """Take up to `batch_size` due notifications away from other dispatchers for LEASE."""
+    with transaction.atomic():
+        due = Notification.objects.filter(status='pending', next_attempt_at__lte=now).order_by('next_attempt_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        batch = list(due[:batch_size])
+        Notification.objects.filter(pk__in=[n.pk for n in batch]).update(next_attempt_at=now + LEASE)
+    return batch
+
+
+def dispatch(batch_size=None, now=None, max_batches=None):
+    """Send due notifications in batches over one mail connection. Returns {'sent': n, 'failed': n, 'retry': n}."""
+    batch_size = batch_size or getattr(settings, 'NOTIFICATION_BATCH_SIZE', 100)
+    max_attempts = getattr(settings, 'NOTIFICATION_MAX_ATTEMPTS', 5)
+    from_email = settings.DEFAULT_FROM_EMAIL
+    counts = {'sent': 0, 'failed': 0, 'retry': 0}
+    mail = None
+    batches = 0
+
+    try:
+        while max_batches is None or batches < max_batches:
+            now = now or timezone.now()
+            batch = _claim(batch_size, now)
+            if not batch:
+                break
+            batches += 1
+
+            sent, unsent = [], []
+            for notification in batch:
+                message = EmailMessage(notification.subject, notification.body, from_email, [notification.to_email])
+                try:
+                    if mail is None:
+                        mail = get_connection(fail_silently=False)
+                        mail.open()
+                    mail.send_messages([message])
+                except Exception as e:
+                    notification.attempts += 1
+                    notification.last_error = f"{type(e).__name__}: {e}"
+                    if notification.attempts >= max_attempts:
+                        notification.status = 'failed'
+                        counts['failed'] += 1
+                    else:
+                        notification.next_attempt_at = now + _backoff(notification.attempts)
+                        counts['retry'] += 1
+                    unsent.append(notification)
+                    # The connection may be broken now; the next message opens a fresh one
+                    if mail is not None:
+                        mail.close()
+                    mail = None
+                else:
+                    sent.append(notification.pk)
+
+            Notification.objects.filter(pk__in=sent).update(
+                status='sent', sent_at=timezone.now(), attempts=F('attempts') + 1,
+            )
+            Notification.objects.bulk_update(unsent, ['attempts', 'last_error', 'status', 'next_attempt_at'])
+            counts['sent'] += len(sent)
+            if len(batch) < batch_size:
+                break
+    finally:
+        if mail is not None:
+            mail.close()
+    return counts
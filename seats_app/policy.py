@@ -0,0 +1,206 @@
+"""
+Booking-window policy.
+
+BookingWindow and Holiday rows (editable in the admin) are compiled into an
+in-memory table:
+
+    windows[(zone, weekday)] -> (booking_open, booking_close, reservation_start, reservation_end)
+    holidays                 -> {(zone, date ordinal), ...}
+
+with every time stored as seconds since local midnight. A check is then a
+couple of dict/set lookups and comparisons: no queries, no timezone
+construction, no logging.
+
+Saving or deleting a policy row recompiles the table in this process right
+away. Every process also re-reads a version of the policy tables (row counts
+and latest updated_at) at most every POLICY_RECHECK_SECONDS and recompiles
+when it has changed, so edits made elsewhere are picked up within that time.
+save(), delete(), bulk_create(), and update() / bulk_update() through the
+models' managers (which stamp updated_at) all change the version; raw SQL
+that leaves updated_at alone does not.
+"""
+import threading
+import time as _time
+from datetime import datetime, time
+
+import pytz
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import BookingWindow, Holiday
+
+# Used when no BookingWindow row matches.
+DEFAULT_BOOKING_OPEN = time(hour=8, minute=30)
+DEFAULT_BOOKING_CLOSE = time(hour=9, minute=15)
+DEFAULT_RESERVATION_START = time(hour=9, minute=0)
+DEFAULT_RESERVATION_END = time(hour=18, minute=0)
+
+
+def _seconds(t):
+    return t.hour * 3600 + t.minute * 60 + t.second + t.microsecond / 1e6
+
+
+def _time_of(seconds):
+    seconds = int(seconds)
+    return time(seconds // 3600, seconds % 3600 // 60, seconds % 60)
+
+
+DEFAULT_WINDOW = (
+    _seconds(DEFAULT_BOOKING_OPEN),
+    _seconds(DEFAULT_BOOKING_CLOSE),
+    _seconds(DEFAULT_RESERVATION_START),
+    _seconds(DEFAULT_RESERVATION_END),
+)
+
+
+def _policy_tz():
+    return pytz.timezone(getattr(settings, 'BOOKING_TIME_ZONE', 'Asia/Karachi'))
+
+
+class CompiledPolicy:
+    __slots__ = ('tz', 'windows', 'holidays', 'version', 'checked_at')
+
+    def __init__(self, tz, windows, holidays, version):
+        self.tz = tz
+        self.windows = windows
+        self.holidays = holidays
+        self.version = version
+        self.checked_at = _time.monotonic()
+
+    def window(self, zone, weekday):
+        return self.windows.get((zone, weekday)) or self.windows[('', weekday)]
+
+    def is_holiday(self, zone, ordinal):
+        return ('', ordinal) in self.holidays or (zone, ordinal) in self.holidays
+
+
+def policy_version():
+    """Changes whenever a BookingWindow or Holiday row is added, changed or deleted through the ORM."""
+    windows = BookingWindow.objects.aggregate(rows=Count('id'), latest=Max('updated_at'))
+    holidays = Holiday.objects.aggregate(rows=Count('id'), latest=Max('updated_at'))
+    return (windows['rows'], windows['latest'], holidays['rows'], holidays['latest'])
+
+
+def compile_policy(version=None):
+    """Build a CompiledPolicy from the active BookingWindow and Holiday rows."""
+    tz = _policy_tz()
+    rows = list(BookingWindow.objects.filter(is_active=True).order_by('id'))
+
+    # Specificity: (zone, weekday) > (zone, any day) > (all zones, weekday) > (all zones, any day)
+    by_key = {(row.zone, row.weekday): (
+        _seconds(row.booking_open),
+        _seconds(row.booking_close),
+        _seconds(row.reservation_start),
+        _seconds(row.reservation_end),
+    ) for row in rows}
+    windows = {}
+    for zone in {''} | {row.zone for row in rows}:
+        for weekday in range(7):
+            windows[(zone, weekday)] = (
+                by_key.get((zone, weekday))
+                or by_key.get((zone, None))
+                or by_key.get(('', weekday))
+                or by_key.get(('', None))
+                or DEFAULT_WINDOW
+            )
+
+    holidays = frozenset(
+        (zone, day.toordinal()) for zone, day in Holiday.objects.values_list('zone', 'date')
+    )
+    return CompiledPolicy(tz, windows, holidays, version)
+
+
+_policy = None
+_lock = threading.Lock()
+
+
+def get_policy():
+    global _policy
+    policy = _policy
+    recheck = getattr(settings, 'POLICY_RECHECK_SECONDS', 30)
+    if policy is not None and _time.monotonic() - policy.checked_at < recheck:
+        return policy
+
+    with _lock:
+        try:
+            version = policy_version()
+            if _policy is not None and _policy.version == version:
+                _policy.checked_at = _time.monotonic()
+                return _policy
+            _policy = compile_policy(version)
+        except DatabaseError:
+            # Tables not migrated yet: run on the defaults without caching them.
+            return CompiledPolicy(_policy_tz(), {('', d): DEFAULT_WINDOW for d in range(7)}, frozenset(), None)
+        return _policy
+
+
+def invalidate():
+    """Drop the compiled table here; other processes see the new version on their next recheck."""
+    global _policy
+    with _lock:
+        _policy = None
+
+
+@receiver([post_save, post_delete], sender=BookingWindow)
+@receiver([post_save, post_delete], sender=Holiday)
+def _policy_changed(sender, **kwargs):
+    invalidate()
+
+
+def _local(now, policy):
+    return (now or timezone.now()).astimezone(policy.tz)
+
+
+def in_booking_window(now=None, zone=''):
+    """Is booking open at `now` (default: now) for seats in `zone`?"""
+    policy = get_policy()
+    local = _local(now, policy)
+    if policy.is_holiday(zone, local.toordinal()):
+        return False
+    opens, closes, _, _ = policy.window(zone, local.weekday())
+    t = local.hour * 3600 + local.minute * 60 + local.second + local.microsecond / 1e6
+    if opens <= closes:
+        # normal case: same day
+        return opens <= t <= closes
+    # overnight case: e.g., 23:30 → 00:00
+    return t >= opens or t <= closes
+
+
+def in_reservation_period(now=None, zone=''):
+    policy = get_policy()
+    local = _local(now, policy)
+    _, _, starts, ends = policy.window(zone, local.weekday())
+    t = local.hour * 3600 + local.minute * 60 + local.second + local.microsecond / 1e6
+    return starts <= t <= ends
+
+
+def window_for(day, zone=''):
+    """Opening times for `day` as time objects (for display), or None on a holiday."""
+    policy = get_policy()
+    if policy.is_holiday(zone, day.toordinal()):
+        return None
+    opens, closes, starts, ends = policy.window(zone, day.weekday())
+    return {
+        'booking_open': _time_of(opens),
+        'booking_close': _time_of(closes),
+        'reservation_start': _time_of(starts),
+        'reservation_end': _time_of(ends),
+    }
+
+
+def reservation_expiry(day, zone=''):
+    """Aware datetime at which a reservation for `day` in `zone` expires."""
+    policy = get_policy()
+    _, _, _, ends = policy.window(zone, day.weekday())
+    return policy.tz.localize(datetime.combine(day, _time_of(ends)))
+
+
+def reservation_start(day, zone=''):
+    """Aware datetime at which the reservation period for `day` in `zone` starts."""
+    policy = get_policy()
+    _, _, starts, _ = policy.window(zone, day.weekday())
+    return policy.tz.localize(datetime.combine(day, _time_of(starts)))
@@ -0,0 +1,237 @@
+"""
+Opt-in profiling of single requests, for staff.
+
+Add ``?_profile`` (or ``?_profile=sample``) to a URL, or send an
+``X-Profile: cprofile|sample`` header, while logged in as staff. That request
+then runs under cProfile or a sampling profiler, with every SQL statement
+recorded together with its duration and the project code that issued it. The
+report is stored as a ProfileReport, listed at /profiles/, and linked from the
+response's X-Profile-Report header. Streaming responses are profiled until the
+stream ends.
+
+Other requests pay for one substring test on the query string and one header
+lookup. With PROFILING_ENABLED = False the middleware removes itself at
+startup.
+"""
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.urls import reverse
+
+from .models import ProfileReport
+
+QUERY_PARAM = '_profile'
+HEADER = 'HTTP_X_PROFILE'
+MODES = ('cprofile', 'sample')
+
+
+def requested_mode(request):
+    """'cprofile', 'sample' or None. Cheap enough to run on every request."""
+    value = request.META.get(HEADER)
+    if value is None:
+        if QUERY_PARAM not in request.META.get('QUERY_STRING', ''):
+            return None
+        value = request.GET.get(QUERY_PARAM)
+        if value is None:
+            return None
+    value = value.strip().lower()
+    return value if value in MODES else 'cprofile'
+
+
+class QueryRecorder:
+    """execute_wrapper that times each statement and notes the project code that ran it."""
+
+    def __init__(self, base_dir):
+        self.base_dir = str(base_dir)
+        self.queries = []
+
+    def _origin(self):
+        frames = [
+            frame for frame in traceback.extract_stack()
+            if frame.filename.startswith(self.base_dir)
+            and 'site-packages' not in frame.filename
+            and not frame.filename.endswith('profiling.py')
+        ]
+        return [f"{frame.filename[len(self.base_dir) + 1:]}:{frame.lineno} in {frame.name}" for frame in frames[-3:]]
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'ms': round((time.perf_counter() - start) * 1000, 3),
+                'alias': context['connection'].alias,
+                'origin': self._origin(),
+            })
+
+
+class Sampler:
+    """Samples one thread's Python stack every `interval` seconds from a helper thread."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({_short(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def report(self, top=40):
+        total = sum(self.stacks.values())
+        if not total:
+            return "No samples (the request finished within one sampling interval)."
+        own, inclusive = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')
+            own[frames[-1]] += count
+            for frame in set(frames):
+                inclusive[frame] += count
+
+        lines = [f"{total} samples every {self.interval * 1000:g} ms", "", "Own time:"]
+        lines += [f"{count / total:7.1%}  {frame}" for frame, count in own.most_common(top)]
+        lines += ["", "Inclusive time:"]
+        lines += [f"{count / total:7.1%}  {frame}" for frame, count in inclusive.most_common(top)]
+        lines += ["", "Stacks (collapsed, for flamegraph.pl):"]
+        lines += [f"{stack} {count}" for stack, count in self.stacks.most_common(top)]
+        return '\n'.join(lines)
+
+
+def _short(filename):
+    for marker in ('site-packages/', str(settings.BASE_DIR) + '/'):
+        index = filename.find(marker)
+        if index != -1:
+            return filename[index + len(marker):]
+    return filename
+
+
+class _Run:
+    """One profiled request: the SQL recorder, the profiler and the clock."""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.recorder = QueryRecorder(settings.BASE_DIR)
+        self.stack = ExitStack()
+        for connection in connections.all():
+            self.stack.enter_context(connection.execute_wrapper(self.recorder))
+        if mode == 'sample':
+            self.profiler = Sampler(threading.get_ident(), getattr(settings, 'PROFILING_SAMPLE_INTERVAL', 0.001))
+            self.profiler.start()
+        else:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self.start = time.perf_counter()
+        self.duration = None
+
+    def stop(self):
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self.start
+        if self.mode == 'sample':
+            self.profiler.stop()
+        else:
+            self.profiler.disable()
+        self.stack.close()
+
+    def text(self, top):
+        if self.mode == 'sample':
+            return self.profiler.report(top)
+        out = io.StringIO()
+        pstats.Stats(self.profiler, stream=out).strip_dirs().sort_stats('cumulative').print_stats(top)
+        return out.getvalue()
+
+
+class ProfilingMiddleware:
+    """
+    Must come after AuthenticationMiddleware (it checks request.user.is_staff).
+
+    A streaming response (e.g. the exports) is profiled until its last chunk
+    has been sent. Its report is saved at once, so the X-Profile-Report link
+    works, and filled in when the stream ends.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = requested_mode(request)
+        if mode is None or not request.user.is_staff:
+            return self.get_response(request)
+        return self.profile(request, mode)
+
+    def profile(self, request, mode):
+        run = _Run(mode)
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            run.stop()
+            raise
+
+        report = ProfileReport(
+            user=request.user,
+            method=request.method,
+            path=request.get_full_path()[:500],
+            mode=mode,
+            status_code=response.status_code,
+            duration_ms=0, sql_count=0, sql_ms=0, profile='',
+        )
+        if response.streaming:
+            report.profile = "Still streaming…"
+            recorded = len(run.recorder.queries)
+            report.save()
+            del run.recorder.queries[recorded:]
+            response.streaming_content = self._stream(response.streaming_content, run, report)
+        else:
+            run.stop()
+            self._save(report, run)
+        response['X-Profile-Report'] = reverse('seats:profile_detail', args=[report.pk])
+        return response
+
+    def _stream(self, content, run, report):
+        try:
+            yield from content
+        finally:
+            run.stop()
+            self._save(report, run)
+
+    def _save(self, report, run):
+        queries = run.recorder.queries
+        report.duration_ms = run.duration * 1000
+        report.sql_count = len(queries)
+        report.sql_ms = sum(query['ms'] for query in queries)
+        report.profile = run.text(getattr(settings, 'PROFILING_TOP_FUNCTIONS', 40))
+        report.queries = queries
+        report.save()
+        keep = getattr(settings, 'PROFILING_KEEP_REPORTS', 200)
+        stale = ProfileReport.objects.order_by('-id').values_list('id', flat=True)[keep:keep + 1000]
+        ProfileReport.objects.filter(id__in=list(stale)).delete()
@@ -0,0 +1,206 @@
+"""
+Token-bucket rate limiting for the seat APIs.
+
+Each endpoint scope (``book``, ``cancel``, ``checkin``, ``status``) gets one
+bucket per user and one per client IP, configured in settings.RATELIMITS, e.g.::
+
+    RATELIMITS = {
+        'book': {'user': '5/10s', 'ip': '30/10s'},
+    }
+
+A rate ``N/period`` means a bucket of N tokens that refills at N per period.
+Over-limit requests get a 429 with a Retry-After header.
+
+Two backends are available (settings.RATELIMIT_BACKEND):
+
+- ``LocalBackend`` keeps buckets in process memory (one set per worker).
+- ``CacheBackend`` keeps buckets in a Django cache (RATELIMIT_CACHE_ALIAS),
+  so workers pointing at a shared cache (database, memcached, redis) share
+  their limits. Updates are read-modify-write, so a burst across workers can
+  overshoot by a token or two; that is acceptable for throttling.
+
+A request takes a token from its user and its IP bucket only when both have
+one, so a request refused by one bucket does not drain the other.
+
+On views that are also @idempotent, @ratelimit goes inside it: a retry
+answered from the stored response costs no token, and a 429 (which carries
+Retry-After) is not stored.
+"""
+import math
+import re
+import threading
+import time
+from functools import lru_cache, wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from django.utils.module_loading import import_string
+
+_RATE_RE = re.compile(r'^\s*(\d+)\s*/\s*(\d*)\s*([smhd])\s*$')
+_PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """Turn '5/10s' into (capacity, tokens per second)."""
+    match = _RATE_RE.match(rate)
+    if not match:
+        raise ValueError(f"Invalid rate {rate!r}, expected e.g. '10/m' or '5/10s'")
+    count, multiplier, unit = match.groups()
+    period = int(multiplier or 1) * _PERIODS[unit]
+    count = int(count)
+    return count, count / period
+
+
+def _take(states, now):
+    """
+    Refill buckets [(tokens, stamp, capacity, refill)] up to `now` and take one
+    token from each, but only if every bucket has one.
+    Returns ([tokens], retry_after) where retry_after is 0 when allowed.
+    """
+    tokens = [min(capacity, held + (now - stamp) * refill) for held, stamp, capacity, refill in states]
+    retry_after = max(
+        ((1 - held) / refill for held, (_, _, _, refill) in zip(tokens, states) if held < 1), default=0.0,
+    )
+    if not retry_after:
+        tokens = [held - 1 for held in tokens]
+    return tokens, retry_after
+
+
+class LocalBackend:
+    """Buckets in a dict guarded by a lock. Fast, but per process."""
+
+    # Every this many calls, drop buckets that have refilled completely.
+    prune_every = 1024
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._calls = 0
+
+    def consume(self, buckets, now=None):
+        """Take a token from every (key, capacity, refill) bucket; returns seconds to wait, or 0."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            states = []
+            for key, capacity, refill in buckets:
+                held, stamp, _ = self._buckets.get(key, (capacity, now, 0))
+                states.append((held, stamp, capacity, refill))
+            tokens, retry_after = _take(states, now)
+            for (key, capacity, refill), held in zip(buckets, tokens):
+                # A bucket is full again (same as a new one) after this moment.
+                self._buckets[key] = (held, now, now + (capacity - held) / refill)
+            self._calls += 1
+            if self._calls >= self.prune_every:
+                self._calls = 0
+                self._prune(now)
+        return retry_after
+
+    def _prune(self, now):
+        stale = [k for k, (_, _, full_at) in self._buckets.items() if full_at <= now]
+        for k in stale:
+            del self._buckets[k]
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBackend:
+    """
+    Buckets in a Django cache, shared by every worker using that cache.
+
+    Each bucket is stored with the limiter's generation number. reset() bumps
+    the generation, which turns every bucket back into a full one without
+    touching the other keys in the cache.
+    """
+    generation_key = 'rl:generation'
+
+    def __init__(self):
+        self.alias = getattr(settings, 'RATELIMIT_CACHE_ALIAS', 'default')
+
+    def consume(self, buckets, now=None):
+        """Take a token from every (key, capacity, refill) bucket; returns seconds to wait, or 0."""
+        # Wall clock, since monotonic clocks are not comparable across processes.
+        now = time.time() if now is None else now
+        cache = caches[self.alias]
+        keys = [f"rl:{key}" for key, _, _ in buckets]
+        stored = cache.get_many([self.generation_key, *keys])
+        generation = stored.get(self.generation_key, 0)
+        states = []
+        for cache_key, (_, capacity, refill) in zip(keys, buckets):
+            held, stamp, bucket_generation = stored.get(cache_key) or (capacity, now, generation)
+            if bucket_generation != generation:
+                held, stamp = capacity, now
+            states.append((held, stamp, capacity, refill))
+        tokens, retry_after = _take(states, now)
+        cache.set_many(
+            {cache_key: (held, now, generation) for cache_key, held in zip(keys, tokens)},
+            max(math.ceil(capacity / refill) for _, capacity, refill in buckets) + 1,
+        )
+        return retry_after
+
+    def reset(self):
+        cache = caches[self.alias]
+        try:
+            cache.incr(self.generation_key)
+        except ValueError:
+            cache.set(self.generation_key, 1, None)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                path = getattr(settings, 'RATELIMIT_BACKEND', 'seats_app.ratelimit.LocalBackend')
+                _backend = import_string(path)()
+    return _backend
+
+
+def client_ip(request):
+    if getattr(settings, 'RATELIMIT_TRUST_X_FORWARDED_FOR', False):
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def check(request, scope):
+    """Return seconds to wait if `request` is over the limit for `scope`, else 0."""
+    limits = getattr(settings, 'RATELIMITS', {}).get(scope)
+    if not limits or not getattr(settings, 'RATELIMIT_ENABLED', True):
+        return 0
+    buckets = []
+    user_rate = limits.get('user')
+    if user_rate and request.user.is_authenticated:
+        buckets.append((f"{scope}:u:{request.user.pk}", *parse_rate(user_rate)))
+    ip_rate = limits.get('ip')
+    if ip_rate:
+        buckets.append((f"{scope}:ip:{client_ip(request)}", *parse_rate(ip_rate)))
+    if not buckets:
+        return 0
+    return get_backend().consume(buckets)
+
+
+def ratelimit(scope):
+    """Decorator: answer 429 + Retry-After when the caller is over the `scope` limit."""
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            retry_after = check(request, scope)
+            if retry_after:
+                response = JsonResponse(
+                    {'ok': False, 'error': 'Too many requests. Please slow down.'},
+                    status=429,
+                )
+                response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+                return response
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
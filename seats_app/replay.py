@@ -0,0 +1,232 @@
+"""
+Point-in-time seat maps, rebuilt from the ReservationLog event stream.
+
+Every log row carries its seat and the reservation's date, so who held which
+seat on a day at any moment is a replay of that day's events in
+(timestamp, id) order. created and promoted put a reservation on its seat.
+cancelled, expired and released take it off again. checked_in changes nothing.
+
+To keep replays short, take_snapshots() stores each busy day's occupancy as an
+OccupancySnapshot every OCCUPANCY_SNAPSHOT_INTERVAL seconds (the
+snapshot_occupancy job). occupancy_at() starts from the latest snapshot at or
+before the requested time, so it only reads the events logged after that.
+Snapshots are taken OCCUPANCY_SNAPSHOT_LAG seconds in the past, so a row still
+being committed with an earlier timestamp is rarely missed. Each snapshot also
+records the day's highest log id. A row committed later with a higher id but a
+timestamp at or before a snapshot makes that snapshot stale, so the next run
+drops the stale snapshots and takes a new one.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Exists, F, Max, Min, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, NullIf
+from django.utils import timezone
+
+from .models import OccupancySnapshot, Reservation, ReservationLog, Seat
+from .policy import get_policy
+from .seat_cache import get_seat_layout
+
+HOLDS = ('created', 'promoted')
+FREES = ('cancelled', 'expired', 'released')
+
+
+def local_day(at):
+    """The booking day (in the policy time zone) that `at` falls on."""
+    return timezone.localtime(at, get_policy().tz).date()
+
+
+def apply(occupancy, seat_id, reservation_id, user_id, action):
+    """Apply one event to {seat_id: (reservation_id, user_id)} in place."""
+    if seat_id is None:
+        return
+    if action in HOLDS:
+        occupancy[seat_id] = (reservation_id, user_id)
+    elif action in FREES:
+        held = occupancy.get(seat_id)
+        if held is None:
+            return
+        # Only the reservation holding the seat can free it. Logs whose
+        # reservation was deleted are matched by user instead.
+        holder = held[1] == user_id if reservation_id is None else held[0] == reservation_id
+        if holder:
+            del occupancy[seat_id]
+
+
+def events(day, after=None, until=None):
+    """(seat_id, reservation_id, user_id, action) of `day`'s events in (after, until], in order."""
+    queryset = ReservationLog.objects.filter(date=day, action__in=HOLDS + FREES)
+    if after is not None:
+        queryset = queryset.filter(timestamp__gt=after)
+    if until is not None:
+        queryset = queryset.filter(timestamp__lte=until)
+    return queryset.order_by('timestamp', 'id').values_list('seat_id', 'reservation_id', 'user_id', 'action')
+
+
+def occupancy_at(at, day=None):
+    """
+    Occupancy of `day` (default: the day of `at`) as it stood at `at`.
+    Returns ({seat_id: (reservation_id, user_id)}, snapshot used or None, events replayed).
+    """
+    day = day or local_day(at)
+    snapshot = OccupancySnapshot.objects.filter(date=day, taken_at__lte=at).order_by('-taken_at').first()
+    occupancy = {}
+    if snapshot is not None:
+        occupancy = {seat_id: (reservation_id, user_id) for seat_id, reservation_id, user_id in snapshot.occupancy}
+    replayed = 0
+    for event in events(day, snapshot.taken_at if snapshot else None, at).iterator(chunk_size=2000):
+        apply(occupancy, *event)
+        replayed += 1
+    return occupancy, snapshot, replayed
+
+
+def seat_map_as_of(at):
+    """
+    Like seat_cache.seat_map(), for the day of `at` as it stood at `at`, plus
+    {'day', 'snapshot', 'replayed'}. The layout is today's; seats removed since
+    are not shown.
+    """
+    day = local_day(at)
+    occupancy, snapshot, replayed = occupancy_at(at, day)
+    usernames = dict(
+        get_user_model().objects
+        .filter(pk__in={user_id for _, user_id in occupancy.values()})
+        .values_list('id', 'username')
+    )
+    seats = []
+    for seat in get_seat_layout():
+        held = occupancy.get(seat['id'])
+        seats.append({
+            **seat,
+            'is_reserved': held is not None,
+            'user_id': held[1] if held else None,
+            'username': usernames.get(held[1]) if held else None,
+        })
+    return seats, {'day': day, 'snapshot': snapshot, 'replayed': replayed}
+
+
+def snapshot_day(day, at):
+    """Store `day`'s occupancy as of `at`. Returns the snapshot, or None if nothing changed since the last."""
+    last_log_id = ReservationLog.objects.filter(date=day).aggregate(last=Max('id'))['last'] or 0
+    occupancy, _, replayed = occupancy_at(at, day)
+    if not replayed:
+        return None
+    snapshot, _ = OccupancySnapshot.objects.update_or_create(
+        date=day, taken_at=at,
+        defaults={
+            'occupancy': sorted([seat_id, *held] for seat_id, held in occupancy.items()),
+            'events': replayed,
+            'last_log_id': last_log_id,
+        },
+    )
+    return snapshot
+
+
+def drop_stale_snapshots(day):
+    """
+    Delete `day`'s snapshots that miss a log row committed after them but
+    timestamped at or before them. Returns the number deleted.
+    """
+    latest = OccupancySnapshot.objects.filter(date=day).order_by('-taken_at').first()
+    if latest is None:
+        return 0
+    late = ReservationLog.objects.filter(
+        date=day, id__gt=latest.last_log_id, timestamp__lte=latest.taken_at,
+    ).aggregate(first=Min('timestamp'))['first']
+    if late is None:
+        return 0
+    deleted, _ = OccupancySnapshot.objects.filter(date=day, taken_at__gte=late).delete()
+    return deleted
+
+
+def take_snapshots(at=None):
+    """
+    Snapshot every day with log rows not yet in its latest snapshot: timestamped
+    after it, or committed after it (a higher log id). Returns the new snapshots.
+    """
+    at = at or timezone.now() - timedelta(seconds=getattr(settings, 'OCCUPANCY_SNAPSHOT_LAG', 60))
+    latest = OccupancySnapshot.objects.filter(date=OuterRef('date')).order_by('-taken_at')
+    logged = ReservationLog.objects.filter(date__isnull=False, timestamp__lte=at).annotate(
+        snapshot_at=Subquery(latest.values('taken_at')[:1]),
+        snapshot_log_id=Subquery(latest.values('last_log_id')[:1]),
+    ).filter(
+        Q(snapshot_at__isnull=True) | Q(timestamp__gt=F('snapshot_at')) | Q(id__gt=F('snapshot_log_id'))
+    )
+    days = sorted(set(logged.values_list('date', flat=True).distinct()))
+    snapshots = []
+    for day in days:
+        drop_stale_snapshots(day)
+        snapshot = snapshot_day(day, at)
+        if snapshot is not None:
+            snapshots.append(snapshot)
+    return snapshots
+
+
+def _pages(queryset, chunk_size):
+    """Model instances of `queryset` in pk order, a list of at most `chunk_size` at a time."""
+    last = 0
+    while True:
+        page = list(queryset.filter(pk__gt=last).order_by('pk')[:chunk_size])
+        if not page:
+            return
+        yield page
+        last = page[-1].pk
+
+
+def backfill(chunk_size=2000):
+    """
+    Complete the log written before it was an event stream:
+    - fill in seat, seat_code and date from the reservation (or seat_code);
+    - add a 'created' event for reservations that have none (at created_at);
+    - add the missing end event of cancelled / expired / released ones (at
+      expires_at, or the check-in deadline for released; the cancel time of
+      old rows is unknown, so expires_at stands in for it).
+    Snapshots are dropped if anything changed, since they may now be wrong.
+    Returns counts.
+    """
+    counts = {'filled': 0, 'created': 0, 'ended': 0, 'unplaceable': 0}
+    reservation = Reservation.objects.filter(pk=OuterRef('reservation_id'))
+    incomplete = ReservationLog.objects.filter(Q(seat__isnull=True) | Q(date__isnull=True) | Q(seat_code=''))
+
+    linked = incomplete.filter(reservation__isnull=False)
+    for page in _pages(linked.only('pk'), chunk_size):
+        counts['filled'] += ReservationLog.objects.filter(pk__in=[log.pk for log in page]).update(
+            seat_id=Coalesce('seat_id', Subquery(reservation.values('seat_id')[:1])),
+            seat_code=Coalesce(NullIf('seat_code', Value('')), Subquery(reservation.values('seat__code')[:1])),
+            date=Coalesce('date', Subquery(reservation.values('date')[:1])),
+        )
+
+    # Reservation gone: the seat can still be found by code, the day cannot
+    seat = Seat.objects.filter(code=OuterRef('seat_code'))
+    orphans = incomplete.filter(Exists(seat), reservation__isnull=True, seat__isnull=True)
+    for page in _pages(orphans.only('pk'), chunk_size):
+        counts['filled'] += ReservationLog.objects.filter(pk__in=[log.pk for log in page]).update(
+            seat_id=Subquery(seat.values('id')[:1]),
+        )
+    counts['unplaceable'] = ReservationLog.objects.filter(Q(seat__isnull=True) | Q(date__isnull=True)).count()
+
+    logged = ReservationLog.objects.filter(reservation_id=OuterRef('pk'))
+    unlogged = Reservation.objects.select_related('seat').filter(~Exists(logged.filter(action__in=HOLDS)))
+    for page in _pages(unlogged, chunk_size):
+        ReservationLog.objects.bulk_create(
+            [ReservationLog.build(res, 'created', res.created_at) for res in page]
+        )
+        counts['created'] += len(page)
+
+    for status in FREES:
+        unended = Reservation.objects.select_related('seat').filter(
+            ~Exists(logged.filter(action=status)), status=status,
+        )
+        for page in _pages(unended, chunk_size):
+            ReservationLog.objects.bulk_create([
+                ReservationLog.build(
+                    res, status, (res.checkin_deadline if status == 'released' else None) or res.expires_at,
+                )
+                for res in page
+            ])
+            counts['ended'] += len(page)
+
+    if counts['filled'] or counts['created'] or counts['ended']:
+        OccupancySnapshot.objects.all().delete()
+    return counts
@@ -0,0 +1,93 @@
+"""
+Cached read models for the seat map.
+
+- The seat layout (active seats and their coordinates) changes only when an
+  admin edits seats. It is dropped when a Seat is saved or deleted, and
+  expires after LAYOUT_CACHE_TTL seconds regardless.
+- Occupancy (who holds which seat on a given day) is cached per date for
+  OCCUPANCY_CACHE_TTL seconds and dropped whenever a Reservation changes.
+
+Both are dropped once the change commits, not when it is saved: dropped any
+earlier, a concurrent request could cache the old rows again and keep them
+until the TTL runs out.
+
+Both live in the default Django cache, which settings.py configures as a
+shared one (Redis or a database table), so a change made in one worker is
+seen by all. The signals fire only in the process making the change, and
+bulk writes send none; the TTLs bound how long anything missed stays stale.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Reservation, Seat
+
+LAYOUT_KEY = 'seats:layout'
+LAYOUT_FIELDS = ('id', 'code', 'row', 'col', 'x', 'y', 'is_active', 'is_reservable')
+
+
+def _occupancy_key(day):
+    return f"seats:occupancy:{day.isoformat()}"
+
+
+def get_seat_layout():
+    """Active seats ordered by code, as a list of plain dicts."""
+    layout = cache.get(LAYOUT_KEY)
+    if layout is None:
+        layout = list(Seat.objects.filter(is_active=True).order_by('code').values(*LAYOUT_FIELDS))
+        cache.set(LAYOUT_KEY, layout, getattr(settings, 'LAYOUT_CACHE_TTL', 300))
+    return layout
+
+
+def get_occupancy(day):
+    """Map seat_id -> {'reservation_id', 'user_id', 'username'} of active reservations on `day`."""
+    key = _occupancy_key(day)
+    occupancy = cache.get(key)
+    if occupancy is None:
+        rows = (
+            Reservation.objects
+            .filter(date=day, status='active')
+            .values_list('seat_id', 'id', 'user_id', 'user__username')
+        )
+        occupancy = {
+            seat_id: {'reservation_id': res_id, 'user_id': user_id, 'username': username}
+            for seat_id, res_id, user_id, username in rows
+        }
+        cache.set(key, occupancy, getattr(settings, 'OCCUPANCY_CACHE_TTL', 30))
+    return occupancy
+
+
+def seat_map(day):
+    """Layout rows annotated with is_reserved / user_id / username for `day`."""
+    occupancy = get_occupancy(day)
+    seats = []
+    for seat in get_seat_layout():
+        held = occupancy.get(seat['id'])
+        seats.append({
+            **seat,
+            'is_reserved': held is not None,
+            'user_id': held['user_id'] if held else None,
+            'username': held['username'] if held else None,
+        })
+    return seats
+
+
+def invalidate_layout():
+    cache.delete(LAYOUT_KEY)
+
+
+def invalidate_occupancy(day):
+    cache.delete(_occupancy_key(day))
+
+
+@receiver([post_save, post_delete], sender=Seat)
+def _seat_changed(sender, **kwargs):
+    transaction.on_commit(invalidate_layout)
+
+
+@receiver([post_save, post_delete], sender=Reservation)
+def _reservation_changed(sender, instance, **kwargs):
+    day = instance.date
+    transaction.on_commit(lambda: invalidate_occupancy(day))
@@ -0,0 +1,139 @@
+"""
+Standing (recurring) reservations.
+
+materialise() turns every active StandingReservation into ordinary Reservation
+rows for the next few days in one bulk_create, so regulars don't have to book
+in the morning window. Conflicts with the partial unique constraints (seat or
+user already booked that day) are detected up front against the existing
+active reservations and recorded as StandingReservationSkip rows. The insert
+itself ignores conflicts, so a booking that races the job loses nothing.
+Running the job twice for the same days is a no-op, and reports no new skips.
+
+When this runs outside a server (the daily command), no process has the new
+check-in deadlines in its timer wheel; the servers' release threads pick them
+up from the check-in-due index within CHECKIN_RESYNC_SECONDS (see checkin.py).
+"""
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .checkin import checkin_deadline, track
+from .models import Reservation, ReservationLog, StandingReservation, StandingReservationSkip
+from .policy import get_policy, reservation_expiry
+from .seat_cache import invalidate_occupancy
+
+
+def materialise(start=None, days=None, now=None, chunk_size=1000):
+    """
+    Create reservations for standing bookings on `days` days from `start`
+    (default: tomorrow and settings.STANDING_RESERVATION_DAYS_AHEAD days on).
+    Returns {'created': n, 'skipped': n}, counting only newly recorded skips.
+    """
+    now = now or timezone.now()
+    start = start or date.today() + timedelta(days=1)
+    days = days or getattr(settings, 'STANDING_RESERVATION_DAYS_AHEAD', 2)
+    end = start + timedelta(days=days - 1)
+    counts = {'created': 0, 'skipped': 0}
+
+    standings = list(
+        StandingReservation.objects
+        .filter(is_active=True, start_date__lte=end)
+        .filter(Q(end_date__isnull=True) | Q(end_date__gte=start))
+        .select_related('seat')
+        .order_by('created_at', 'id')  # older standing bookings win a clash
+    )
+    if not standings:
+        return counts
+
+    policy = get_policy()
+    with transaction.atomic():
+        seats_taken, users_booked, done = set(), set(), set()
+        existing = (
+            Reservation.objects
+            .filter(date__range=(start, end), status='active')
+            .values_list('seat_id', 'user_id', 'date', 'standing_id')
+        )
+        for seat_id, user_id, day, standing_id in existing:
+            seats_taken.add((seat_id, day))
+            users_booked.add((user_id, day))
+            if standing_id:
+                done.add((standing_id, day))
+
+        wanted, skips = [], []
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            for standing in standings:
+                seat = standing.seat
+                if (
+                    (standing.id, day) in done
+                    or not standing.applies_to(day)
+                    or policy.is_holiday(seat.zone, day.toordinal())
+                ):
+                    continue
+                if not (seat.is_active and seat.is_reservable):
+                    reason = 'seat_unavailable'
+                elif (seat.id, day) in seats_taken:
+                    reason = 'seat_taken'
+                elif (standing.user_id, day) in users_booked:
+                    reason = 'user_booked'
+                else:
+                    seats_taken.add((seat.id, day))
+                    users_booked.add((standing.user_id, day))
+                    wanted.append(Reservation(
+                        user_id=standing.user_id,
+                        seat=seat,
+                        date=day,
+                        expires_at=reservation_expiry(day, seat.zone),
+                        checkin_deadline=checkin_deadline(day, seat.zone, now),
+                        standing=standing,
+                        status='active',
+                        is_active=True,
+                    ))
+                    continue
+                skips.append(StandingReservationSkip(standing=standing, date=day, reason=reason, created_at=now))
+
+        # ignore_conflicts: rows that lost a race to a live booking are dropped,
+        # not fatal. It also means no ids come back, so read the rows back.
+        Reservation.objects.bulk_create(wanted, batch_size=chunk_size, ignore_conflicts=True)
+        stored = {
+            (reservation.standing_id, reservation.date): reservation
+            for reservation in Reservation.objects.filter(
+                standing__in=standings, date__range=(start, end), status='active',
+            ).select_related('seat')
+        }
+        created = []
+        for reservation in wanted:
+            key = (reservation.standing_id, reservation.date)
+            if key in stored:
+                created.append(stored[key])
+            else:  # lost a race to a live booking
+                skips.append(StandingReservationSkip(
+                    standing_id=reservation.standing_id, date=reservation.date,
+                    reason='seat_taken', created_at=now,
+                ))
+
+        ReservationLog.objects.bulk_create(
+            [ReservationLog.build(reservation, 'created', now) for reservation in created],
+            batch_size=chunk_size,
+        )
+        # Count only skips not recorded by an earlier run
+        recorded = set(
+            StandingReservationSkip.objects
+            .filter(standing__in=standings, date__range=(start, end))
+            .values_list('standing_id', 'date')
+        )
+        skips = [skip for skip in skips if (skip.standing_id, skip.date) not in recorded]
+        StandingReservationSkip.objects.bulk_create(skips, batch_size=chunk_size, ignore_conflicts=True)
+
+        for reservation in created:
+            track(reservation)
+        # bulk_create sends no post_save, so drop the cached occupancy ourselves
+        days_changed = {reservation.date for reservation in created}
+        transaction.on_commit(lambda: [invalidate_occupancy(day) for day in days_changed])
+
+    counts['created'] = len(created)
+    counts['skipped'] = len(skips)
+    return counts
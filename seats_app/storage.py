@@ -0,0 +1,18 @@
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+
+class PrecacheManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Hashed static filenames (logo.3f2a9c.png) so the service worker and
+    browsers can cache them forever.
+
+    Before `collectstatic` has run (development, tests) there is no manifest;
+    fall back to the plain name instead of raising.
+    """
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
@@ -0,0 +1,85 @@
+// Workspace+ service worker — generated by seats_app.views.service_worker.
+// Version {{ version }}: changes whenever a precached static file changes.
+const VERSION = "{{ version }}";
+const STATIC_CACHE = `wsp-static-${VERSION}`;
+const RUNTIME_CACHE = "wsp-runtime";
+const STATIC_URL = "{{ static_url }}";
+const PRECACHE = {{ precache|safe }};
+// Shell pages and APIs served stale-while-revalidate.
+const SWR_PATHS = {{ swr_paths|safe }};
+const LOGOUT_PATH = "{{ logout_path }}";
+
+self.addEventListener('install', (event) => {
+  event.waitUntil(
+    caches.open(STATIC_CACHE)
+      .then((cache) => cache.addAll(PRECACHE))
+      .then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener('activate', (event) => {
+  // Drop precaches from older versions; keep the runtime cache.
+  event.waitUntil(
+    caches.keys()
+      .then((keys) => Promise.all(
+        keys.filter((key) => key !== STATIC_CACHE && key !== RUNTIME_CACHE)
+            .map((key) => caches.delete(key))
+      ))
+      .then(() => self.clients.claim())
+  );
+});
+
+// Hashed static files never change under the same URL: serve from cache.
+async function cacheFirst(request) {
+  const cached = await caches.match(request);
+  if (cached) return cached;
+  const response = await fetch(request);
+  if (response.ok) {
+    const cache = await caches.open(STATIC_CACHE);
+    cache.put(request, response.clone());
+  }
+  return response;
+}
+
+// Answer from cache immediately, refresh the copy in the background.
+async function staleWhileRevalidate(event) {
+  const cache = await caches.open(RUNTIME_CACHE);
+  const cached = await cache.match(event.request);
+  const network = fetch(event.request).then((response) => {
+    // Redirects mean the session ended (login page): don't keep them.
+    if (response.ok && !response.redirected) {
+      cache.put(event.request, response.clone());
+    }
+    return response;
+  });
+  if (cached) {
+    event.waitUntil(network.catch(() => null));
+    return cached;
+  }
+  return network;
+}
+
+self.addEventListener('fetch', (event) => {
+  const request = event.request;
+  const url = new URL(request.url);
+  if (url.origin !== self.location.origin) return;
+
+  if (request.method !== 'GET') {
+    // A booking or cancel changes the shell and status: forget cached copies.
+    event.respondWith(
+      fetch(request).finally(() => caches.delete(RUNTIME_CACHE))
+    );
+    return;
+  }
+
+  if (url.pathname === LOGOUT_PATH) {
+    event.respondWith(caches.delete(RUNTIME_CACHE).then(() => fetch(request)));
+    return;
+  }
+
+  if (url.pathname.startsWith(STATIC_URL)) {
+    event.respondWith(cacheFirst(request));
+  } else if (SWR_PATHS.includes(url.pathname)) {
+    event.respondWith(staleWhileRevalidate(event));
+  }
+});
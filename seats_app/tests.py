@@ -1,3 +1,871 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import date, time as dtime, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.staticfiles import finders
+from django.core import mail
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.http import JsonResponse
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from seats_app import policy, ratelimit
+from seats_app.apps import SeatsAppConfig
+from seats_app.checkin import overdue, release_due, release_no_show
+from seats_app.idempotency import idempotent
+from seats_app.models import (
+    BookingWindow, Notification, OccupancySnapshot, ProfileReport, Reservation, ReservationLog, Seat,
+    StandingReservation, StandingReservationSkip, WaitlistEntry,
+)
+from seats_app.notifications import dispatch, enqueue_reminders
+from seats_app.policy import get_policy, reservation_expiry, reservation_start
+from seats_app.replay import backfill, occupancy_at, snapshot_day, take_snapshots
+from seats_app.seat_cache import LAYOUT_KEY, _occupancy_key, get_occupancy
+from seats_app.standing import materialise
+from seats_app.timerwheel import TimerWheel
+from seats_app.warmup import warm_up
+from utils.synthetic import generate
+
+# Wall-time ceilings are generous so slow machines don't flake; scale them
+# with PERF_TIME_SCALE=2 (or more) on very slow runners.
+TIME_SCALE = float(os.environ.get('PERF_TIME_SCALE', '1'))
+
+
+# The budgets count the app's own queries. With the shipped DatabaseCache every
+# cache read and write would be counted too, so budget tests use a local cache.
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'budget'}}
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class QueryBudgetTestCase(TestCase):
+    """
+    Runs the views against a few thousand seats and months of history and
+    fails if a view needs more queries (an N+1) or much more time than its
+    budget.
+    """
+    seats = 2000
+    users = 300
+    days = 90
+
+    @classmethod
+    def setUpTestData(cls):
+        generate(seats=cls.seats, users=cls.users, days=cls.days, seed=42)
+        cls.user = User.objects.filter(username__startswith='synth').first()
+        cls.staff = User.objects.create_superuser('perf-admin', 'perf-admin@example.com', 'x')
+
+    def setUp(self):
+        cache.clear()
+
+    @contextmanager
+    def assertBudget(self, max_queries, max_seconds):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            yield captured
+            elapsed = time.perf_counter() - start
+        queries = '\n'.join(q['sql'] for q in captured.captured_queries)
+        self.assertLessEqual(
+            len(captured), max_queries,
+            f"{len(captured)} queries, budget is {max_queries}:\n{queries}",
+        )
+        self.assertLess(elapsed, max_seconds * TIME_SCALE, f"took {elapsed:.3f}s")
+
+
+class SeatViewBudgetTests(QueryBudgetTestCase):
+
+    def test_index(self):
+        self.client.force_login(self.user)
+        # session, user, layout, occupancy, own reservation
+        with self.assertBudget(5, 1.0):
+            response = self.client.get(reverse('seats:index'))
+        self.assertEqual(response.status_code, 200)
+        # layout and occupancy now come from the cache
+        with self.assertBudget(3, 0.5):
+            self.client.get(reverse('seats:index'))
+
+    def test_seat_status_api(self):
+        self.client.force_login(self.user)
+        with self.assertBudget(4, 0.5):
+            response = self.client.get(reverse('seats:seat_status_api'))
+        self.assertEqual(response.status_code, 200)
+        seats = response.json()['seats']
+        self.assertEqual(len(seats), self.seats)
+        self.assertTrue(any(s['status'] != 'available' for s in seats))
+
+    def test_admin_map(self):
+        self.client.force_login(self.staff)
+        with self.assertBudget(4, 1.0):
+            response = self.client.get(reverse('seats:admin_map'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_admin_map_as_of(self):
+        self.client.force_login(self.staff)
+        day = date.today() - timedelta(days=30)
+        # session, user, snapshot, the day's events, usernames, layout
+        with self.assertBudget(6, 1.0):
+            response = self.client.get(reverse('seats:admin_map'), {'as_of': f'{day}T12:00'})
+        self.assertEqual(response.status_code, 200)
+        held = sum(seat['is_reserved'] for seat in response.context['seats'])
+        # Synthetic reservations all start before noon; the cancelled ones end at midday
+        self.assertGreater(held, Reservation.objects.filter(date=day).count() * 0.9)
+        self.assertNotContains(response, 'Save Positions')
+
+    def test_export_streams_in_one_query(self):
+        self.client.force_login(self.staff)
+        # session, user, one SELECT with the joins, however many rows
+        with self.assertBudget(3, 5.0):
+            response = self.client.get(reverse('seats:export_data', args=['reservations']))
+            lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), Reservation.objects.count() + 1)
+        with self.assertBudget(3, 5.0):
+            response = self.client.get(reverse('seats:export_data', args=['logs']), {'format': 'jsonl'})
+            rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), ReservationLog.objects.count())
+        self.assertTrue(all(row['seat'] for row in rows))
+
+    def test_save_positions(self):
+        self.client.force_login(self.staff)
+        seat_ids = list(Seat.objects.values_list('id', flat=True)[:1200])
+        payload = [{'id': seat_id, 'x': 10, 'y': 20} for seat_id in seat_ids]
+        # session, user, select seats, 3 batched updates (+ savepoints)
+        with self.assertBudget(10, 2.0):
+            response = self.client.post(
+                reverse('seats:save_positions'), data=json.dumps(payload), content_type='application/json'
+            )
+        self.assertEqual(response.json()['updated'], len(seat_ids))
+        self.assertEqual(Seat.objects.filter(x=10, y=20).count(), len(seat_ids))
+
+
+class AdminChangelistBudgetTests(QueryBudgetTestCase):
+
+    def changelist(self, model, max_queries, max_seconds=2.0):
+        self.client.force_login(self.staff)
+        with self.assertBudget(max_queries, max_seconds):
+            response = self.client.get(reverse(f'admin:seats_app_{model}_changelist'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_seat_changelist(self):
+        self.changelist('seat', 8)
+
+    def test_reservation_changelist(self):
+        self.changelist('reservation', 8)
+
+    def test_reservationlog_changelist(self):
+        self.changelist('reservationlog', 8)
+
+
+class BookingClockMixin:
+    """
+    Pins timezone.now() to 08:45 local time today: inside the default booking
+    window. Rate limiting is off, since its local buckets outlive each test.
+    post() calls a seat API as `user` with a JSON payload.
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        no_throttle = override_settings(RATELIMIT_ENABLED=False)
+        no_throttle.enable()
+        self.addCleanup(no_throttle.disable)
+        self.now = reservation_expiry(date.today()).replace(hour=8, minute=45)
+        patcher = mock.patch('django.utils.timezone.now', return_value=self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, user, name, payload=None):
+        self.client.force_login(user)
+        return self.client.post(
+            reverse(f'seats:{name}'), data=json.dumps(payload or {}), content_type='application/json'
+        )
+
+
+class IdempotencyTests(BookingClockMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seats = [Seat.objects.create(code=code, x=0, y=0) for code in ('I1', 'I2')]
+        cls.user, cls.other = (User.objects.create_user(name) for name in ('idem', 'idem-other'))
+
+    def book(self, user, seat, key='k-1'):
+        self.client.force_login(user)
+        return self.client.post(
+            reverse('seats:book_seat_api'), data=json.dumps({'seat_id': seat.id}),
+            content_type='application/json', HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def call(self, view, key='k-1', body=b'{}'):
+        request = RequestFactory().post('/idem/', data=body, content_type='application/json', HTTP_IDEMPOTENCY_KEY=key)
+        request.user = self.user
+        return idempotent(view)(request)
+
+    def test_retry_replays_stored_response(self):
+        first = self.book(self.user, self.seats[0])
+        second = self.book(self.user, self.seats[0])
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual((second.status_code, second.content), (200, first.content))
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertNotIn('Idempotent-Replayed', first)
+        self.assertEqual(Reservation.objects.filter(user=self.user).count(), 1)
+
+    def test_key_reused_for_another_body_is_refused(self):
+        self.book(self.user, self.seats[0])
+        response = self.book(self.user, self.seats[1])
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Reservation.objects.get(user=self.user).seat, self.seats[0])
+
+    def test_keys_are_scoped_per_user(self):
+        self.book(self.user, self.seats[0])
+        response = self.book(self.other, self.seats[1])
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Reservation.objects.get(user=self.other).seat, self.seats[1])
+
+    def test_duplicate_while_in_flight_gets_409(self):
+        def view(request):
+            # The same request arriving again before this one has finished
+            nested.append(self.call(view))
+            return JsonResponse({'ok': True})
+
+        nested = []
+        self.assertEqual(self.call(view).status_code, 200)
+        self.assertEqual((nested[0].status_code, nested[0]['Retry-After']), (409, '1'))
+
+    def test_retry_after_seat_lock_is_released(self):
+        # A concurrent booking holds the seat row (skip_locked found it locked)
+        with mock.patch('seats_app.views._lock_seat', return_value=None):
+            locked = self.book(self.user, self.seats[0])
+        self.assertEqual((locked.status_code, locked['Retry-After']), (503, '1'))
+        retried = self.book(self.user, self.seats[0])
+        self.assertEqual(retried.status_code, 200)
+        self.assertNotIn('Idempotent-Replayed', retried)
+        self.assertEqual(Reservation.objects.get(user=self.user).seat, self.seats[0])
+
+    def test_server_error_releases_key(self):
+        responses = iter([JsonResponse({'ok': False}, status=503), JsonResponse({'ok': True})])
+        calls = []
+
+        def view(request):
+            calls.append(request)
+            return next(responses)
+
+        self.assertEqual(self.call(view).status_code, 503)
+        self.assertEqual(self.call(view).status_code, 200)
+        self.assertEqual(self.call(view).status_code, 200)  # replayed
+        self.assertEqual(len(calls), 2)
+
+
+@override_settings(RATELIMIT_ENABLED=True, RATELIMITS={'status': {'user': '2/m', 'ip': '3/m'}})
+class RateLimitTests(TestCase):
+    backends = ('seats_app.ratelimit.LocalBackend', 'seats_app.ratelimit.CacheBackend')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice, cls.bob = (User.objects.create_user(name) for name in ('rl-alice', 'rl-bob'))
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(setattr, ratelimit, '_backend', None)
+
+    @contextmanager
+    def backend(self, path):
+        with self.subTest(backend=path), override_settings(RATELIMIT_BACKEND=path):
+            ratelimit._backend = None
+            ratelimit.get_backend().reset()
+            yield ratelimit.get_backend()
+
+    def status(self, user, ip='10.0.0.1'):
+        self.client.force_login(user)
+        return self.client.get(reverse('seats:seat_status_api'), REMOTE_ADDR=ip)
+
+    def test_over_limit_gets_429_with_retry_after(self):
+        for path in self.backends:
+            with self.backend(path):
+                self.assertEqual([self.status(self.alice).status_code for _ in range(2)], [200, 200])
+                response = self.status(self.alice)
+                self.assertEqual(response.status_code, 429)
+                self.assertEqual(response['Retry-After'], '30')  # 2/m: one token per 30 s
+
+    def test_user_and_ip_buckets(self):
+        for path in self.backends:
+            with self.backend(path):
+                codes = [self.status(self.alice).status_code for _ in range(3)]
+                self.assertEqual(codes, [200, 200, 429])
+                # Alice's refused request took no IP token, so one is left for Bob
+                self.assertEqual(self.status(self.bob).status_code, 200)
+                self.assertEqual(self.status(self.bob).status_code, 429)
+                # ...who is not limited from another address
+                self.assertEqual(self.status(self.bob, ip='10.0.0.2').status_code, 200)
+
+    @override_settings(RATELIMITS={'cancel': {'user': '1/m'}})
+    def test_replayed_retry_costs_no_token(self):
+        self.client.force_login(self.alice)
+
+        def cancel(key):
+            return self.client.post(reverse('seats:cancel_reservation_api'), HTTP_IDEMPOTENCY_KEY=key)
+
+        with self.backend('seats_app.ratelimit.LocalBackend'):
+            self.assertEqual(cancel('k-1').status_code, 404)
+            retry = cancel('k-1')
+            self.assertEqual((retry.status_code, retry['Idempotent-Replayed']), (404, 'true'))
+            self.assertEqual(cancel('k-2').status_code, 429)
+            ratelimit.get_backend().reset()
+            # The 429 was not stored under k-2
+            self.assertEqual(cancel('k-2').status_code, 404)
+
+    def test_reset_leaves_other_cache_keys(self):
+        with self.backend('seats_app.ratelimit.CacheBackend') as backend:
+            cache.set('unrelated', 1)
+            buckets = [('status:u:1', 1, 1 / 60)]
+            self.assertEqual(backend.consume(buckets), 0)
+            self.assertGreater(backend.consume(buckets), 0)
+            backend.reset()
+            self.assertEqual(backend.consume(buckets), 0)
+            self.assertEqual(cache.get('unrelated'), 1)
+
+
+class SeatCacheTests(TestCase):
+
+    def test_dropped_only_when_the_change_commits(self):
+        seat = Seat.objects.create(code='C1')
+        user = User.objects.create_user('cache-user')
+        today = date.today()
+        cache.clear()
+        warm_up()
+        with self.captureOnCommitCallbacks(execute=True):
+            Reservation.objects.create(user=user, seat=seat, date=today, expires_at=reservation_expiry(today))
+            Seat.objects.create(code='C2')
+            # Other requests still get the committed state until then
+            self.assertEqual(cache.get(_occupancy_key(today)), {})
+            self.assertEqual([row['code'] for row in cache.get(LAYOUT_KEY)], ['C1'])
+        self.assertIsNone(cache.get(_occupancy_key(today)))
+        self.assertIsNone(cache.get(LAYOUT_KEY))
+        self.assertEqual(get_occupancy(today)[seat.id]['user_id'], user.id)
+
+
+class WarmUpTests(TestCase):
+
+    def test_fills_seat_caches(self):
+        Seat.objects.create(code='W1')
+        cache.clear()
+        warm_up()
+        self.assertEqual([seat['code'] for seat in cache.get(LAYOUT_KEY)], ['W1'])
+        self.assertEqual(cache.get(_occupancy_key(date.today())), {})
+
+    def test_only_servers_start_background_threads(self):
+        cases = [
+            (['manage.py', 'runserver'], {'RUN_MAIN': 'true'}, True),
+            (['manage.py', 'runserver'], {}, False),  # the autoreloader's parent
+            (['/venv/bin/gunicorn', 'seat_reservation_project.wsgi'], {}, True),
+            (['manage.py', 'test'], {}, False),
+            (['/venv/bin/pytest'], {}, False),
+            (['/venv/bin/django-admin', 'shell'], {}, False),
+            (['worker.py'], {'SEATS_SERVING': '1'}, True),
+        ]
+        base = {key: value for key, value in os.environ.items() if key not in ('RUN_MAIN', 'SEATS_SERVING')}
+        for argv, environ, serving in cases:
+            with self.subTest(argv=argv), mock.patch('sys.argv', argv), \
+                    mock.patch.dict(os.environ, {**base, **environ}, clear=True):
+                self.assertIs(SeatsAppConfig._is_serving(), serving)
+
+
+class ServiceWorkerTests(TestCase):
+
+    def test_served_from_root_uncached(self):
+        response = self.client.get('/sw.js')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('application/javascript'))
+        self.assertEqual(response['Service-Worker-Allowed'], '/')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+    def test_precache_lists_real_static_files(self):
+        script = self.client.get('/sw.js').content.decode()
+        line = next(line for line in script.splitlines() if line.startswith('const PRECACHE = '))
+        urls = json.loads(line[len('const PRECACHE = '):].rstrip(';'))
+        self.assertEqual(len(urls), len(settings.SW_PRECACHE_ASSETS))
+        for url in urls:
+            self.assertTrue(url.startswith(settings.STATIC_URL), url)
+            self.assertIsNotNone(finders.find(url[len(settings.STATIC_URL):]), url)
+
+
+class PolicyTests(TestCase):
+
+    def setUp(self):
+        policy.invalidate()
+        self.addCleanup(policy.invalidate)
+
+    def window(self, **fields):
+        return BookingWindow(
+            booking_open=dtime(7), booking_close=dtime(8), reservation_start=dtime(8), reservation_end=dtime(17),
+            **fields,
+        )
+
+    @override_settings(POLICY_RECHECK_SECONDS=0)
+    def test_picks_up_edits_made_without_signals(self):
+        self.assertEqual(get_policy().window('', 0)[0], 8.5 * 3600)
+        # As another process (or a bulk write) would: no post_save here
+        BookingWindow.objects.bulk_create([self.window()])
+        self.assertEqual(get_policy().window('', 0)[0], 7 * 3600)
+        BookingWindow.objects.update(booking_open=dtime(6))
+        self.assertEqual(get_policy().window('', 0)[0], 6 * 3600)
+
+    def test_one_every_day_window_per_zone(self):
+        self.window(zone='North').save()
+        self.window(zone='North', weekday=0).save()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.window(zone='North').save()
+
+
+class WaitlistTests(BookingClockMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seat = Seat.objects.create(code='C3', x=0, y=0)
+        cls.holder, cls.first, cls.second = (
+            User.objects.create_user(name) for name in ('holder', 'first', 'second')
+        )
+
+    def test_cancel_promotes_head_of_queue(self):
+        self.assertEqual(self.post(self.holder, 'book_seat_api', {'seat_id': self.seat.id}).status_code, 200)
+        self.assertEqual(self.post(self.first, 'join_waitlist_api', {'seat_id': self.seat.id}).json()['position'], 1)
+        self.assertEqual(self.post(self.second, 'join_waitlist_api', {'seat_id': self.seat.id}).json()['position'], 2)
+
+        self.assertEqual(self.post(self.holder, 'cancel_reservation_api').status_code, 200)
+
+        active = Reservation.objects.get(seat=self.seat, date=date.today(), status='active')
+        self.assertEqual(active.user, self.first)
+        self.assertTrue(ReservationLog.objects.filter(reservation=active, action='promoted').exists())
+        self.assertEqual(
+            list(WaitlistEntry.objects.order_by('id').values_list('status', flat=True)), ['promoted', 'waiting']
+        )
+
+    def test_waiter_with_another_seat_is_skipped(self):
+        other = Seat.objects.create(code='C4', x=60, y=0)
+        self.post(self.holder, 'book_seat_api', {'seat_id': self.seat.id})
+        self.post(self.first, 'join_waitlist_api', {'seat_id': self.seat.id})
+        self.post(self.second, 'join_waitlist_api', {'seat_id': self.seat.id})
+        self.post(self.first, 'book_seat_api', {'seat_id': other.id})
+
+        self.post(self.holder, 'cancel_reservation_api')
+
+        self.assertEqual(Reservation.objects.get(seat=self.seat, status='active').user, self.second)
+        self.assertEqual(WaitlistEntry.objects.get(user=self.first).status, 'skipped')
+
+    def test_cannot_join_waitlist_for_free_seat(self):
+        response = self.post(self.first, 'join_waitlist_api', {'seat_id': self.seat.id})
+        self.assertEqual(response.status_code, 409)
+
+    def test_expiry_promotes_and_logs(self):
+        self.post(self.holder, 'book_seat_api', {'seat_id': self.seat.id})
+        self.post(self.first, 'join_waitlist_api', {'seat_id': self.seat.id})
+
+        Reservation.objects.get(user=self.holder).expire()
+
+        self.assertEqual(Reservation.objects.get(user=self.holder).status, 'expired')
+        self.assertEqual(Reservation.objects.get(seat=self.seat, status='active').user, self.first)
+        self.assertEqual(
+            sorted(ReservationLog.objects.values_list('action', flat=True)), ['created', 'expired', 'promoted']
+        )
+
+
+class TimerWheelTests(TestCase):
+
+    def test_fires_in_order_across_levels(self):
+        wheel = TimerWheel(now=1000, slots=4, levels=2)
+        # 2 s lands in level 0, 9 s in level 1, 100 s in the overflow bucket
+        wheel.schedule('late', 1100)
+        wheel.schedule('soon', 1002)
+        wheel.schedule('later', 1009.5)
+        self.assertEqual(wheel.advance(1001.9), [])
+        self.assertEqual(wheel.advance(1009), ['soon'])
+        self.assertEqual(wheel.advance(1010), ['later'])
+        self.assertEqual(wheel.advance(1099), [])
+        self.assertEqual(wheel.advance(1100), ['late'])
+        self.assertEqual(len(wheel), 0)
+
+    def test_cancel_and_reschedule(self):
+        wheel = TimerWheel(now=0)
+        wheel.schedule(1, 30)
+        wheel.schedule(2, 30)
+        wheel.schedule(2, 500)  # replaces the first timer
+        self.assertTrue(wheel.cancel(1))
+        self.assertFalse(wheel.cancel(1))
+        self.assertEqual(wheel.advance(499), [])
+        self.assertEqual(wheel.advance(500), [2])
+
+    def test_past_deadline_fires_on_next_tick(self):
+        wheel = TimerWheel(now=100)
+        wheel.schedule('x', 50)
+        self.assertEqual(wheel.advance(101), ['x'])
+
+
+class CheckInTests(BookingClockMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seat = Seat.objects.create(code='D1', x=0, y=0)
+        cls.holder, cls.waiter = (User.objects.create_user(name) for name in ('holder', 'waiter'))
+
+    def book(self):
+        self.post(self.holder, 'book_seat_api', {'seat_id': self.seat.id})
+        return Reservation.objects.get(user=self.holder)
+
+    def test_deadline_is_grace_after_reservation_start(self):
+        reservation = self.book()
+        self.assertEqual(reservation.checkin_deadline, reservation_start(date.today()) + timedelta(minutes=30))
+
+    def test_no_show_is_released_to_waitlist(self):
+        reservation = self.book()
+        self.post(self.waiter, 'join_waitlist_api', {'seat_id': self.seat.id})
+        self.assertIn(self.seat.id, get_occupancy(date.today()))
+
+        deadline = reservation.checkin_deadline
+        self.assertFalse(release_no_show(reservation.id, now=deadline - timedelta(seconds=1)))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(release_no_show(reservation.id, now=deadline))
+
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.status, 'released')
+        promoted = Reservation.objects.get(seat=self.seat, status='active')
+        self.assertEqual(promoted.user, self.waiter)
+        self.assertEqual(promoted.checkin_deadline, deadline + timedelta(minutes=30))
+        # The cached occupancy shows the new holder straight away
+        self.assertEqual(get_occupancy(date.today())[self.seat.id]['user_id'], self.waiter.id)
+        self.assertTrue(ReservationLog.objects.filter(reservation=reservation, action='released').exists())
+
+    def test_resync_releases_deadlines_set_elsewhere(self):
+        # Booked with no wheel running here, as in another worker or a cron job
+        reservation = self.book()
+        wheel = TimerWheel(now=self.now.timestamp())
+        after = reservation.checkin_deadline + timedelta(seconds=1)
+        self.assertEqual(release_due(wheel, now=after), [])
+        self.assertEqual(release_due(wheel, now=after, resync=True), [reservation.id])
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.status, 'released')
+
+    def test_checked_in_reservation_is_kept(self):
+        reservation = self.book()
+        response = self.post(self.holder, 'check_in_api')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(overdue(reservation.checkin_deadline), [])
+        self.assertFalse(release_no_show(reservation.id, now=reservation.checkin_deadline))
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.status, 'active')
+        self.assertEqual(reservation.checked_in_at, self.now)
+
+    def test_check_in_after_deadline_is_refused(self):
+        reservation = self.book()
+        with mock.patch('django.utils.timezone.now', return_value=reservation.checkin_deadline):
+            response = self.post(self.holder, 'check_in_api')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(overdue(reservation.checkin_deadline), [reservation.id])
+
+
+class StandingReservationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.monday = date.today() + timedelta(days=7 - date.today().weekday())
+        cls.seat = Seat.objects.create(code='E1')
+        cls.regular, cls.newcomer, cls.walk_in = (
+            User.objects.create_user(name) for name in ('regular', 'newcomer', 'walk-in')
+        )
+        cls.mon_to_thu = StandingReservation.objects.create(
+            user=cls.regular, seat=cls.seat, weekdays='0123', start_date=cls.monday,
+        )
+
+    def test_materialises_matching_weekdays_once(self):
+        counts = materialise(start=self.monday, days=7)
+        self.assertEqual(counts, {'created': 4, 'skipped': 0})
+        days = Reservation.objects.filter(standing=self.mon_to_thu).values_list('date', flat=True)
+        self.assertEqual(sorted(d.weekday() for d in days), [0, 1, 2, 3])
+        self.assertEqual(ReservationLog.objects.filter(action='created').count(), 4)
+
+        self.assertEqual(materialise(start=self.monday, days=7), {'created': 0, 'skipped': 0})
+        self.assertEqual(Reservation.objects.count(), 4)
+
+    def test_conflicts_are_skipped_and_logged(self):
+        tuesday = self.monday + timedelta(days=1)
+        # Someone already booked the seat on Tuesday
+        Reservation.objects.create(
+            user=self.walk_in, seat=self.seat, date=tuesday, expires_at=reservation_expiry(tuesday),
+        )
+        # A newer standing booking for the same seat loses every clash to the older one
+        clash = StandingReservation.objects.create(
+            user=self.newcomer, seat=self.seat, weekdays='01', start_date=self.monday,
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            counts = materialise(start=self.monday, days=2)
+
+        self.assertEqual(counts, {'created': 1, 'skipped': 3})
+        self.assertEqual(Reservation.objects.get(standing__isnull=False).date, self.monday)
+        self.assertEqual(
+            sorted(StandingReservationSkip.objects.values_list('standing_id', 'date', 'reason')),
+            sorted([
+                (self.mon_to_thu.id, tuesday, 'seat_taken'),
+                (clash.id, self.monday, 'seat_taken'),
+                (clash.id, tuesday, 'seat_taken'),
+            ]),
+        )
+        # A rerun records nothing new
+        self.assertEqual(materialise(start=self.monday, days=2), {'created': 0, 'skipped': 0})
+        self.assertEqual(StandingReservationSkip.objects.count(), 3)
+
+
+class ExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('hr', is_staff=True)
+        cls.alice, cls.bob = User.objects.create_user('alice'), User.objects.create_user('bob')
+        seat = Seat.objects.create(code='F1', zone='North')
+        for day, user in ((date(2025, 1, 31), cls.alice), (date(2025, 2, 3), cls.alice), (date(2025, 2, 4), cls.bob)):
+            reservation = Reservation.objects.create(
+                user=user, seat=seat, date=day, expires_at=reservation_expiry(day), status='expired',
+            )
+            ReservationLog.record(reservation, 'created', reservation_expiry(day))
+
+    def export(self, kind, **params):
+        self.client.force_login(self.staff)
+        return self.client.get(reverse('seats:export_data', args=[kind]), params)
+
+    def test_csv_with_filters(self):
+        response = self.export('reservations', start='2025-02-01', end='2025-02-28', user='alice')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="reservations-2025-02-01-2025-02-28-alice.csv"')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:5], ['id', 'date', 'user', 'seat', 'zone'])
+        self.assertEqual([row[1:5] for row in rows[1:]], [['2025-02-03', 'alice', 'F1', 'North']])
+
+    def test_csv_is_safe_to_open_in_a_spreadsheet(self):
+        User.objects.filter(pk=self.bob.pk).update(username='=HYPERLINK("x")')
+        response = self.export('reservations', user='=HYPERLINK("x")', seat='F1";\r\nX: y')
+        self.assertEqual(
+            response['Content-Disposition'], 'attachment; filename="reservations-_HYPERLINK__x__-F1____X__y.csv"',
+        )
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('seats:export_data', args=['reservations']))
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row[2] for row in rows[1:]], ['alice', 'alice', '\'=HYPERLINK("x")'])
+
+    def test_logs_use_local_days(self):
+        response = self.export('logs', format='jsonl', start='2025-02-04', end='2025-02-04', seat='F1')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([(row['user'], row['seat'], row['reservation_date']) for row in rows], [('bob', 'F1', '2025-02-04')])
+
+    def test_logs_keep_the_day_of_deleted_reservations(self):
+        Reservation.objects.filter(user=self.bob).delete()
+        response = self.export('logs', format='jsonl', user='bob')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([(row['reservation_id'], row['reservation_date']) for row in rows], [(None, '2025-02-04')])
+
+    def test_rejects_bad_input_and_non_staff(self):
+        self.assertEqual(self.export('reservations', start='yesterday').status_code, 400)
+        self.assertEqual(self.export('reservations', format='xlsx').status_code, 400)
+        self.assertEqual(self.export('payroll').status_code, 404)
+        self.client.force_login(self.alice)
+        response = self.client.get(reverse('seats:export_data', args=['reservations']))
+        self.assertEqual(response.status_code, 302)
+
+
+class NotificationTests(BookingClockMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seat = Seat.objects.create(code='G1')
+        cls.users = [User.objects.create_user(f'user{i}', f'user{i}@nayatel.com') for i in range(5)]
+        User.objects.create_user('no-email')
+
+    def test_cancel_queues_and_dispatch_sends_over_one_connection(self):
+        user = self.users[0]
+        self.client.force_login(user)
+        self.client.post(reverse('seats:book_seat_api'), data={'seat_id': self.seat.id}, content_type='application/json')
+        self.client.post(reverse('seats:cancel_reservation_api'), content_type='application/json')
+        self.assertEqual(mail.outbox, [])  # nothing is sent inside the request
+        enqueue_reminders(date.today())
+
+        with mock.patch('seats_app.notifications.get_connection', wraps=mail.get_connection) as get_connection:
+            counts = dispatch(batch_size=2)
+
+        self.assertEqual(counts, {'sent': 6, 'failed': 0, 'retry': 0})
+        self.assertEqual(get_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 6)
+        self.assertEqual(
+            sorted(m.subject for m in mail.outbox if m.to == [user.email]),
+            ['Reservation cancelled: seat G1', 'Seat booking opens at 8:30 AM'],
+        )
+        self.assertFalse(Notification.objects.exclude(status='sent').exists())
+
+    def test_reminders_are_queued_once(self):
+        self.assertEqual(enqueue_reminders(date.today()), 5)
+        self.assertEqual(enqueue_reminders(date.today()), 0)
+        self.assertEqual(Notification.objects.filter(kind='reminder').count(), 5)
+
+    @override_settings(NOTIFICATION_MAX_ATTEMPTS=2)
+    def test_failures_back_off_then_give_up(self):
+        Notification.objects.create(
+            user=self.users[0], kind='reminder', to_email='a@nayatel.com', subject='s', body='b', next_attempt_at=self.now,
+        )
+        failing = mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=ConnectionError('down'),
+        )
+        with failing:
+            self.assertEqual(dispatch(now=self.now), {'sent': 0, 'failed': 0, 'retry': 1})
+            notification = Notification.objects.get()
+            self.assertEqual(notification.next_attempt_at, self.now + timedelta(seconds=60))
+            self.assertEqual(notification.last_error, 'ConnectionError: down')
+            self.assertEqual(dispatch(now=self.now + timedelta(seconds=59)), {'sent': 0, 'failed': 0, 'retry': 0})
+            self.assertEqual(dispatch(now=self.now + timedelta(seconds=60)), {'sent': 0, 'failed': 1, 'retry': 0})
+        self.assertEqual(Notification.objects.get().status, 'failed')
+        self.assertEqual(dispatch(now=self.now + timedelta(days=1)), {'sent': 0, 'failed': 0, 'retry': 0})
+
+
+class ProfilingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('ops', is_staff=True)
+        cls.user = User.objects.create_user('someone')
+        Seat.objects.create(code='H1')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_staff_profile_records_sql_with_origin(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('seats:index'), {'_profile': ''})
+        report = ProfileReport.objects.get()
+        self.assertEqual(response['X-Profile-Report'], reverse('seats:profile_detail', args=[report.pk]))
+        self.assertEqual((report.mode, report.status_code), ('cprofile', 200))
+        self.assertIn('cumulative', report.profile)
+        self.assertEqual(report.sql_count, len(report.queries))
+        origins = [frame for query in report.queries for frame in query['origin']]
+        self.assertTrue(any(frame.startswith('seats_app/seat_cache.py') for frame in origins), origins)
+
+        page = self.client.get(reverse('seats:profile_detail', args=[report.pk]))
+        self.assertContains(page, 'seats_app_reservation')
+        self.assertContains(self.client.get(reverse('seats:profile_list')), '/?_profile=')
+
+    def test_sampling_mode_from_header(self):
+        self.client.force_login(self.staff)
+        self.client.get(reverse('seats:seat_status_api'), HTTP_X_PROFILE='sample')
+        self.assertEqual(ProfileReport.objects.get().mode, 'sample')
+
+    def test_streaming_response_profiled_to_the_end(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('seats:export_data', args=['reservations']), {'_profile': ''})
+        report = ProfileReport.objects.get()
+        self.assertEqual(response['X-Profile-Report'], reverse('seats:profile_detail', args=[report.pk]))
+        self.assertEqual(report.sql_count, 0)
+        b''.join(response.streaming_content)
+        report.refresh_from_db()
+        self.assertIn('cumulative', report.profile)
+        self.assertTrue(any('seats_app_reservation' in query['sql'] for query in report.queries), report.queries)
+
+    def test_ignored_for_non_staff_and_unrequested(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('seats:index'), {'_profile': 'sample'})
+        self.assertNotIn('X-Profile-Report', response)
+        self.client.force_login(self.staff)
+        self.client.get(reverse('seats:index'), {'q': 'not_profile'})
+        self.assertFalse(ProfileReport.objects.exists())
+        self.assertEqual(self.client.get(reverse('seats:profile_list')).status_code, 200)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('seats:profile_list')).status_code, 302)
+
+
+class ReplayTests(BookingClockMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seat = Seat.objects.create(code='R1', x=0, y=0)
+        cls.holder, cls.waiter = (User.objects.create_user(name) for name in ('r-holder', 'r-waiter'))
+        cls.staff = User.objects.create_user('r-staff', is_staff=True)
+
+    def holder_at(self, at):
+        occupancy, _, _ = occupancy_at(at)
+        held = occupancy.get(self.seat.id)
+        return held and held[1]
+
+    def test_every_event_has_seat_and_date(self):
+        self.post(self.holder, 'book_seat_api', {'seat_id': self.seat.id})
+        self.post(self.holder, 'check_in_api')
+        self.post(self.holder, 'cancel_reservation_api')
+        logs = ReservationLog.objects.values_list('action', 'seat_id', 'seat_code', 'date')
+        self.assertEqual(
+            sorted(logs),
+            sorted((action, self.seat.id, 'R1', date.today()) for action in ('created', 'checked_in', 'cancelled')),
+        )
+
+    def test_occupancy_at_replays_from_snapshots(self):
+        self.post(self.holder, 'book_seat_api', {'seat_id': self.seat.id})
+        self.post(self.waiter, 'join_waitlist_api', {'seat_id': self.seat.id})
+        reservation = Reservation.objects.get(user=self.holder)
+        deadline = reservation.checkin_deadline
+        release_no_show(reservation.id, now=deadline)
+
+        self.assertIsNone(self.holder_at(self.now - timedelta(seconds=1)))
+        self.assertEqual(self.holder_at(self.now), self.holder.id)
+        self.assertEqual(self.holder_at(deadline - timedelta(seconds=1)), self.holder.id)
+        self.assertEqual(self.holder_at(deadline), self.waiter.id)
+
+        snapshot = snapshot_day(date.today(), self.now + timedelta(minutes=1))
+        self.assertEqual(snapshot.occupancy, [[self.seat.id, reservation.id, self.holder.id]])
+        occupancy, used, replayed = occupancy_at(deadline)
+        self.assertEqual((used, replayed), (snapshot, 2))  # released, promoted
+        self.assertEqual(occupancy[self.seat.id][1], self.waiter.id)
+        # Nothing new since: no second snapshot
+        self.assertEqual(take_snapshots(at=deadline - timedelta(minutes=1)), [])
+        self.assertEqual(len(take_snapshots(at=deadline)), 1)
+        self.assertEqual(OccupancySnapshot.objects.count(), 2)
+
+    def test_late_committed_log_is_folded_in(self):
+        self.post(self.holder, 'book_seat_api', {'seat_id': self.seat.id})
+        reservation = Reservation.objects.get(user=self.holder)
+        early = snapshot_day(date.today(), self.now + timedelta(minutes=5))
+        taken_at = self.now + timedelta(minutes=10)
+        snapshot_day(date.today(), taken_at)
+        # Committed after the snapshots, timestamped between them
+        ReservationLog.record(reservation, 'cancelled', self.now + timedelta(minutes=7))
+
+        [snapshot] = take_snapshots(at=taken_at)
+        self.assertEqual((snapshot.taken_at, snapshot.occupancy), (taken_at, []))
+        self.assertEqual(list(OccupancySnapshot.objects.order_by('taken_at')), [early, snapshot])
+        self.assertIsNone(self.holder_at(taken_at))
+        self.assertEqual(take_snapshots(at=taken_at), [])
+
+    def test_admin_map_as_of(self):
+        self.post(self.holder, 'book_seat_api', {'seat_id': self.seat.id})
+        self.client.force_login(self.staff)
+        as_of = timezone.localtime(self.now, get_policy().tz).strftime('%Y-%m-%dT%H:%M')
+        response = self.client.get(reverse('seats:admin_map'), {'as_of': as_of})
+        self.assertContains(response, 'R1 (id: %d) — r-holder' % self.seat.id)
+        self.assertEqual(self.client.get(reverse('seats:admin_map'), {'as_of': 'noon'}).status_code, 400)
+
+    def test_backfill_completes_old_logs(self):
+        yesterday = date.today() - timedelta(days=1)
+        expires_at = reservation_expiry(yesterday)
+        expired = Reservation.objects.create(
+            user=self.holder, seat=self.seat, date=yesterday, expires_at=expires_at,
+            status='expired', is_active=False,
+        )
+        # Written before logs carried seat and date, and with no end event
+        ReservationLog.objects.create(reservation=expired, user=self.holder, action='created', timestamp=self.now)
+        snapshot_day(yesterday, self.now)
+
+        counts = backfill()
+        self.assertEqual((counts['filled'], counts['created'], counts['ended']), (1, 0, 1))
+        self.assertFalse(OccupancySnapshot.objects.exists())
+        self.assertEqual(
+            set(ReservationLog.objects.values_list('action', 'seat_id', 'date', 'timestamp')),
+            {('created', self.seat.id, yesterday, self.now), ('expired', self.seat.id, yesterday, expires_at)},
+        )
+        self.assertEqual(backfill(), {'filled': 0, 'created': 0, 'ended': 0, 'unplaceable': 0})
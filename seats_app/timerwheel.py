@@ -0,0 +1,107 @@
+"""
+Hierarchical timer wheel.
+
+Timers are bucketed by expiry tick into `levels` wheels of `slots` slots each:
+level 0 holds timers due within `slots` ticks, level 1 within slots**2 ticks,
+and so on. Scheduling or cancelling a timer is O(1). Advancing the clock by one
+tick empties one level-0 slot; every `slots` ticks one slot of the next level
+is cascaded down into finer slots. Timers further out than the top level wait
+in an overflow bucket that is re-sorted whenever the top level wraps.
+
+With the defaults (1 s ticks, 64 slots, 4 levels) the wheels cover about
+194 days, far more than a reservation's lifetime.
+"""
+import math
+import threading
+
+
+class TimerWheel:
+
+    def __init__(self, now, tick=1.0, slots=64, levels=4):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self._wheels = [[{} for _ in range(slots)] for _ in range(levels)]
+        self._overflow = {}
+        self._where = {}  # key -> (level, slot); level None means overflow
+        self._current = int(now // tick)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._where)
+
+    def __contains__(self, key):
+        return key in self._where
+
+    def schedule(self, key, when):
+        """Fire `key` once the clock reaches `when` (seconds). Replaces any timer already set for `key`."""
+        expires = math.ceil(when / self.tick)
+        with self._lock:
+            self._remove(key)
+            # Already due: fire on the next tick
+            self._place(key, max(expires, self._current + 1))
+
+    def cancel(self, key):
+        """Drop the timer for `key`; returns whether there was one."""
+        with self._lock:
+            return self._remove(key)
+
+    def advance(self, now):
+        """Move the clock forward to `now` and return the keys of the timers that came due, oldest first."""
+        target = int(now // self.tick)
+        fired = []
+        with self._lock:
+            if not self._where:
+                self._current = max(self._current, target)
+                return fired
+            while self._current < target:
+                self._current += 1
+                self._cascade()
+                slot = self._wheels[0][self._current % self.slots]
+                if slot:
+                    fired.extend(slot)
+                    for key in slot:
+                        del self._where[key]
+                    slot.clear()
+        return fired
+
+    def _place(self, key, expires):
+        delta = expires - self._current
+        unit = 1
+        for level in range(self.levels):
+            if delta < unit * self.slots:
+                slot = (expires // unit) % self.slots
+                self._wheels[level][slot][key] = expires
+                self._where[key] = (level, slot)
+                return
+            unit *= self.slots
+        self._overflow[key] = expires
+        self._where[key] = (None, None)
+
+    def _remove(self, key):
+        where = self._where.pop(key, None)
+        if where is None:
+            return False
+        level, slot = where
+        if level is None:
+            del self._overflow[key]
+        else:
+            del self._wheels[level][slot][key]
+        return True
+
+    def _redistribute(self, bucket):
+        timers = list(bucket.items())
+        bucket.clear()
+        for key, expires in timers:
+            self._place(key, expires)
+
+    def _cascade(self):
+        """On a level boundary, move the next coarse slot's timers down to finer levels."""
+        unit = 1
+        for level in range(1, self.levels):
+            unit *= self.slots
+            if self._current % unit:
+                return
+            self._redistribute(self._wheels[level][(self._current // unit) % self.slots])
+        if self._current % (unit * self.slots) == 0:
+            self._redistribute(self._overflow)
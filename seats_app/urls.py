@@ -8,7 +8,14 @@ urlpatterns = [
     path('api/status/', views.seat_status_api, name='seat_status_api'),
     path('api/book/', views.book_seat_api, name='book_seat_api'),
     path('api/cancel/', views.cancel_reservation_api, name='cancel_reservation_api'),
+    path('api/checkin/', views.check_in_api, name='check_in_api'),
+    path('api/waitlist/join/', views.join_waitlist_api, name='join_waitlist_api'),
+    path('api/waitlist/leave/', views.leave_waitlist_api, name='leave_waitlist_api'),
     path('admin-map/', views.admin_map, name='admin_map'),
+    path('export/<str:kind>/', views.export_data, name='export_data'),
+    path('profiles/', views.profile_list, name='profile_list'),
+    path('profiles/<int:pk>/', views.profile_detail, name='profile_detail'),
     path('api/save-positions/', views.save_positions, name='save_positions'),
+    path('sw.js', views.service_worker, name='service_worker'),
     # path('register/', views.register_view, name='register'),
 ]
\ No newline at end of file
@@ -1,79 +1,56 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
-from django.http import JsonResponse,HttpResponseBadRequest
+from django.http import JsonResponse,HttpResponseBadRequest, Http404, StreamingHttpResponse
 from django.utils import timezone
 from django.views.decorators.http import require_POST
-from datetime import time, date,datetime
+from datetime import date, datetime
+from functools import lru_cache
+import hashlib
 import json
-import pytz
-from .models import Seat, Reservation,ReservationLog
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.urls import reverse
+from django.utils.formats import time_format
+from .models import Seat, Reservation,ReservationLog, WaitlistEntry, ProfileReport
+from .checkin import check_in, checkin_deadline, track
+from . import export
+from .idempotency import idempotent
+from .notifications import enqueue
+from .ratelimit import ratelimit
+from .replay import seat_map_as_of
+from .seat_cache import invalidate_layout, seat_map
+from .policy import get_policy, in_booking_window, in_reservation_period, reservation_expiry, window_for
+from .waitlist import promote_next, queue_position
 from django.contrib import messages
 
-# Time windows
-RESERVATION_START = time(hour=9, minute=0)
-RESERVATION_END = time(hour=18, minute=0)
-BOOKING_OPEN = time(hour=8, minute=30)
-BOOKING_CLOSE = time(hour=9, minute=15)
-
-# BOOKING_OPEN = time(hour=23, minute=30)
-# BOOKING_CLOSE = time(hour=23, minute=52)
-
-def in_booking_window(now=None):
-    """Check if current local time (Asia/Karachi) is within booking window."""
-    pk_tz = pytz.timezone('Asia/Karachi')
-    now = now or timezone.now()
-    local_now = now.astimezone(pk_tz)
-    t = local_now.time()
-
-    print("BOOKING_OPEN :", BOOKING_OPEN, "BOOKING_CLOSE :", BOOKING_CLOSE)
-    print(BOOKING_OPEN <= t)
-    print(t <= BOOKING_CLOSE)
-    print(f"[DEBUG] Local time: {local_now}, Time component: {t}")
-
-    if BOOKING_OPEN <= BOOKING_CLOSE:
-        # normal case: same day
-        return BOOKING_OPEN <= t <= BOOKING_CLOSE
-    else:
-        # overnight case: e.g., 23:30 → 00:00
-        return t >= BOOKING_OPEN or t <= BOOKING_CLOSE
-
-
-def in_reservation_period(now=None):
-    now = now or timezone.localtime()
-    t = now.time()
-    return RESERVATION_START <= t <= RESERVATION_END
-
-
-
 @login_required
 def index(request):
     today = date.today()
 
-    # Handle POST booking (when user clicks Book Selected Seat)
-    
-    seats = list(Seat.objects.filter(is_active=True))
-
-    # Get today’s reservations
-    reservations = Reservation.objects.filter(date=today, status = 'active').select_related("seat", "user")
-
-    # Map seat -> reservation
-    reservation_map = {res.seat.id: res for res in reservations}
-
-    # Annotate each seat with reservation data
-    for seat in seats:
-        res = reservation_map.get(seat.id)
-        seat.is_reserved = bool(res)
-        seat.user = res.user if res else None
+    # Seats annotated with today's occupancy (served from the seat cache)
+    seats = seat_map(today)
 
     # User’s reservation for today
-    user_res = reservations.filter(user=request.user).first()
+    user_res = (
+        Reservation.objects.filter(user=request.user, date=today, status='active')
+        .select_related('seat')
+        .first()
+    )
+
+    # Local time by which the user must check in, while that is still pending
+    checkin_by = None
+    if user_res and user_res.checkin_deadline and not user_res.checked_in_at:
+        checkin_by = timezone.localtime(user_res.checkin_deadline, get_policy().tz).time()
 
     context = {
         "today": today,
         "user_reservation": user_res,
+        "checkin_by": checkin_by,
         "booking_open": in_booking_window(),
         "reservation_period": in_reservation_period(),
+        "window": window_for(today),
         "seats": seats,
     }
 
@@ -85,17 +62,68 @@ def index(request):
 
 @staff_member_required
 def admin_map(request):
-    """Page to visually position seats by dragging. Staff only."""
-    seats = list(Seat.objects.filter(is_active=True))
-    # annotate reservation status for visual convenience (optional)
-    today = date.today()
-    reservations = Reservation.objects.filter(date=today).select_related('seat', 'user')
-    rmap = {r.seat.id: r for r in reservations}
-    for s in seats:
-        res = rmap.get(s.id)
-        s.is_reserved = bool(res)
-        s.user = res.user if res else None
-    return render(request, 'admin_map.html', {'seats': seats})
+    """
+    Page to visually position seats by dragging. Staff only.
+    ?as_of=YYYY-MM-DDTHH:MM (booking time zone) shows who held each seat at
+    that moment, replayed from the reservation log, read-only.
+    """
+    as_of = (request.GET.get('as_of') or '').strip()
+    if not as_of:
+        # annotate reservation status for visual convenience (optional)
+        seats = seat_map(date.today())
+        return render(request, 'admin_map.html', {'seats': seats})
+
+    tz = get_policy().tz
+    try:
+        local = datetime.fromisoformat(as_of)
+        at = tz.localize(local)
+    except ValueError:
+        return HttpResponseBadRequest('as_of must look like 2025-01-06T10:30')
+    seats, replay_info = seat_map_as_of(at)
+    snapshot = replay_info['snapshot']
+    return render(request, 'admin_map.html', {
+        'seats': seats,
+        'as_of': as_of,
+        # naive local times, so the template doesn't shift them to TIME_ZONE
+        'as_of_local': local,
+        'snapshot_local': timezone.localtime(snapshot.taken_at, tz).replace(tzinfo=None) if snapshot else None,
+        'replay': replay_info,
+    })
+
+@staff_member_required
+def export_data(request, kind):
+    """
+    Stream reservations or audit logs as CSV or JSON Lines. Staff only.
+    GET params: format (csv|jsonl), start, end (YYYY-MM-DD), user (username), seat (code).
+    """
+    if kind not in export.EXPORTS:
+        raise Http404
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in export.FORMATS:
+        return HttpResponseBadRequest('format must be csv or jsonl')
+    try:
+        filters = export.parse_filters(request.GET)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+    response = StreamingHttpResponse(
+        export.stream(kind, filters, fmt), content_type=f'{export.FORMATS[fmt]}; charset=utf-8'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{export.filename(kind, filters, fmt)}"'
+    return response
+
+@staff_member_required
+def profile_list(request):
+    """Recent request profiles (taken with ?_profile or an X-Profile header). Staff only."""
+    reports = ProfileReport.objects.select_related('user').defer('profile', 'queries').order_by('-id')[:100]
+    return render(request, 'profiles/list.html', {'reports': reports})
+
+@staff_member_required
+def profile_detail(request, pk):
+    """One request profile: timings, SQL with origins, and the profiler output. Staff only."""
+    report = get_object_or_404(ProfileReport.objects.select_related('user'), pk=pk)
+    queries = sorted(report.queries, key=lambda query: query['ms'], reverse=True)
+    return render(request, 'profiles/detail.html', {'report': report, 'queries': queries})
 
 @require_POST
 @staff_member_required
@@ -111,8 +139,8 @@ def save_positions(request):
     if not isinstance(payload, list):
         return HttpResponseBadRequest('Expected a list of objects')
 
-    updated = 0
     errors = []
+    positions = {}
     for item in payload:
         try:
             seat_id = int(item.get('id'))
@@ -121,132 +149,278 @@ def save_positions(request):
         except Exception as e:
             errors.append(f"Bad item: {item} ({e})")
             continue
-        try:
-            seat = Seat.objects.get(pk=seat_id)
-            seat.x = x
-            seat.y = y
-            seat.save(update_fields=['x', 'y'])
-            updated += 1
-        except Seat.DoesNotExist:
+        positions[seat_id] = (x, y)
+
+    # One SELECT and batched UPDATEs instead of a query pair per seat
+    seats = Seat.objects.only('id', 'x', 'y').in_bulk(list(positions))
+    for seat_id, (x, y) in positions.items():
+        seat = seats.get(seat_id)
+        if seat is None:
             errors.append(f"Seat {seat_id} not found")
+            continue
+        seat.x = x
+        seat.y = y
+    updated = Seat.objects.bulk_update(seats.values(), ['x', 'y'], batch_size=500)
+    invalidate_layout()  # bulk_update skips the post_save signal
 
     return JsonResponse({'ok': True, 'updated': updated, 'errors': errors})
 
 @login_required
+@ratelimit('status')
 def seat_status_api(request):
     """Return JSON list of seats and their status for today."""
     today = date.today()
-    seats = Seat.objects.filter(is_active=True).order_by('code')
-    reserved = Reservation.objects.filter(date=today).select_related('seat', 'user')
-    seat_map = {r.seat_id: r for r in reserved}
-
     data = []
-    for s in seats:
-        r = seat_map.get(s.id)
+    for s in seat_map(today):
         status = 'available'
-        reserved_by = None
-        if r:
-            status = 'reserved'
-            reserved_by = r.user.username
-            if request.user == r.user:
-                status = 'mine'
+        if s['is_reserved']:
+            status = 'mine' if s['user_id'] == request.user.id else 'reserved'
         data.append({
-            'id': s.id,
-            'code': s.code,
-            'row': s.row,
-            'col': s.col,
-            'x': s.x,
-            'y': s.y,
+            'id': s['id'],
+            'code': s['code'],
+            'row': s['row'],
+            'col': s['col'],
+            'x': s['x'],
+            'y': s['y'],
             'status': status,
-            'reserved_by': reserved_by,
+            'reserved_by': s['username'],
         })
     return JsonResponse({'seats': data})
 
 
 
 
+def _seat_from_payload(request):
+    """Parse {"seat_id": ...} from a JSON body; returns (seat_id, error_response)."""
+    if request.content_type != 'application/json':
+        return None, HttpResponseBadRequest('Expected application/json')
+    try:
+        payload = json.loads(request.body.decode('utf-8'))
+    except json.JSONDecodeError:
+        return None, HttpResponseBadRequest('Invalid JSON')
+    seat_id = payload.get('seat_id') if isinstance(payload, dict) else None
+    if not seat_id:
+        return None, JsonResponse({'ok': False, 'error': 'No seat specified.'}, status=400)
+    return seat_id, None
+
+
+def _lock_seat(seat_id):
+    """
+    Lock the seat row for the rest of the transaction.
+
+    Where the database supports SKIP LOCKED (PostgreSQL, MySQL 8), a seat that
+    another request is booking right now comes back as None instead of making
+    this request wait for the other one. SQLite has no row locks; there the
+    partial unique constraints on Reservation are what prevent double booking.
+    Raises Http404 for an unknown or inactive seat.
+    """
+    seats = Seat.objects.filter(pk=seat_id, is_active=True)
+    if not connection.features.has_select_for_update_skip_locked:
+        return get_object_or_404(seats)
+    seat = seats.select_for_update(skip_locked=True).first()
+    if seat is None:
+        get_object_or_404(seats)  # 404 unless it exists but is locked
+    return seat
+
+
 @login_required
 @require_POST
+@idempotent
+@ratelimit('book')
 def book_seat_api(request):
     """
     Attempt to book a seat for the current user for today.
     Enforces booking window, one active reservation per user, and audit logs.
     """
-    if not in_booking_window():
-        return JsonResponse({'ok': False, 'error': 'Booking window is closed.'}, status=403)
-
-    if request.content_type != 'application/json':
-        return HttpResponseBadRequest('Expected application/json')
-
-    try:
-        payload = json.loads(request.body.decode('utf-8'))
-    except json.JSONDecodeError:
-        return HttpResponseBadRequest('Invalid JSON')
-
-    seat_id = payload.get('seat_id')
-    if not seat_id:
-        return JsonResponse({'ok': False, 'error': 'No seat specified.'}, status=400)
+    seat_id, error = _seat_from_payload(request)
+    if error:
+        return error
 
     today = date.today()
-    expires_at = timezone.make_aware(datetime.combine(today, time(18, 0)))  # auto-expire at 6 PM
 
-    # 🛑 Prevent multiple active reservations per user per day
-    if Reservation.objects.filter(user=request.user, date=today, status='active').exists():
-        return JsonResponse({'ok': False, 'error': 'You already have an active reservation today.'}, status=403)
+    with transaction.atomic():
+        seat = _lock_seat(seat_id)
+        if seat is None:
+            # Someone else's booking holds the row; it may yet roll back, so this
+            # is a "try again", not a stored answer for the Idempotency-Key.
+            response = JsonResponse({'ok': False, 'error': 'Seat is being booked by someone else. Try again.'}, status=503)
+            response['Retry-After'] = '1'
+            return response
 
-    seat = get_object_or_404(Seat, pk=seat_id, is_active=True)
+        # The booking window depends on the seat's zone
+        if not in_booking_window(zone=seat.zone):
+            return JsonResponse({'ok': False, 'error': 'Booking window is closed.'}, status=403)
 
-    # 🛑 Ensure seat isn’t already reserved for today (active only)
-    if Reservation.objects.filter(seat=seat, date=today, status='active').exists():
-        return JsonResponse({'ok': False, 'error': 'Seat already reserved by another user.'}, status=403)
-
-    # ✅ Create new reservation
-    reservation = Reservation.objects.create(
-        user=request.user,
-        seat=seat,
-        date=today,
-        expires_at=expires_at,
-        status='active',
-        is_active=True
-    )
+        expires_at = reservation_expiry(today, seat.zone)  # auto-expire at end of reservation hours
 
-    # 🪵 Log reservation creation
-    ReservationLog.objects.create(
-        reservation=reservation,
-        user=request.user,
-        action='created',
-        timestamp=timezone.now()
-    )
+        # 🛑 Prevent multiple active reservations per user per day
+        if Reservation.objects.filter(user=request.user, date=today, status='active').exists():
+            return JsonResponse({'ok': False, 'error': 'You already have an active reservation today.'}, status=403)
+
+        # 🛑 Ensure seat isn’t already reserved for today (active only)
+        if Reservation.objects.filter(seat=seat, date=today, status='active').exists():
+            return JsonResponse({'ok': False, 'error': 'Seat already reserved by another user.'}, status=403)
 
+        # ✅ Create new reservation; the partial unique constraints catch a
+        # concurrent booking that slipped past the checks above.
+        try:
+            with transaction.atomic():
+                reservation = Reservation.objects.create(
+                    user=request.user,
+                    seat=seat,
+                    date=today,
+                    expires_at=expires_at,
+                    checkin_deadline=checkin_deadline(today, seat.zone),
+                    status='active',
+                    is_active=True
+                )
+        except IntegrityError:
+            return JsonResponse({'ok': False, 'error': 'This booking conflicts with another reservation. Please refresh.'}, status=409)
+
+        # ⏰ Release the seat if nobody checks in by the deadline
+        track(reservation)
+
+        # 🪵 Log reservation creation
+        ReservationLog.record(reservation, 'created')
+
+    message = f'Seat {seat.code} booked successfully until {time_format(expires_at.time(), "g:i A")}.'
+    if reservation.checkin_deadline:
+        deadline = timezone.localtime(reservation.checkin_deadline, get_policy().tz)
+        message += f' Check in by {time_format(deadline.time(), "g:i A")} or the seat is released.'
     return JsonResponse({
         'ok': True,
-        'message': f'Seat {seat.code} booked successfully until 6:00 PM.',
-        'reservation_id': reservation.id
+        'message': message,
+        'reservation_id': reservation.id,
+        'checkin_deadline': reservation.checkin_deadline,
     })
 
-
+@login_required
+@require_POST
+@idempotent
+@ratelimit('cancel')
 def cancel_reservation_api(request):
     """Cancel the current user's reservation (soft delete)."""
-    if not in_booking_window():
-        return JsonResponse({'ok': False, 'error': 'Cannot cancel outside reservation hours'}, status=403)
-
     today = date.today()
-    reservation = Reservation.objects.filter(user=request.user, date=today, is_active=True).first()
+    with transaction.atomic():
+        reservation = (
+            Reservation.objects.filter(user=request.user, date=today, is_active=True)
+            .select_for_update(of=('self',))
+            .select_related('seat')
+            .first()
+        )
+
+        if not reservation:
+            return JsonResponse({'ok': False, 'error': 'No active reservation to cancel'}, status=404)
+
+        if not in_booking_window(zone=reservation.seat.zone):
+            return JsonResponse({'ok': False, 'error': 'Cannot cancel outside reservation hours'}, status=403)
+
+        # 🪵 Log the cancellation
+        ReservationLog.record(reservation, 'cancelled')
+
+        # 🔄 Mark reservation as cancelled instead of deleting
+        reservation.is_active = False
+        reservation.status = 'cancelled'
+        reservation.save(update_fields=['is_active', 'status'])
+
+        # ✉️ Queued in this transaction; sent by dispatch_notifications
+        enqueue(request.user, 'cancelled', reservation)
+
+        # 🎟️ Hand the seat to the first person on its waitlist
+        promote_next(reservation.seat, reservation.date)
+
+    return JsonResponse({'ok': True, 'message': 'Reservation cancelled successfully.'})
+
 
+@login_required
+@require_POST
+@idempotent
+@ratelimit('checkin')
+def check_in_api(request):
+    """Check the current user in to today's reservation so it is not released as a no-show."""
+    reservation = (
+        Reservation.objects.filter(user=request.user, date=date.today(), status='active')
+        .select_related('seat')
+        .first()
+    )
     if not reservation:
-        return JsonResponse({'ok': False, 'error': 'No active reservation to cancel'}, status=404)
-
-    # 🪵 Log the cancellation
-    ReservationLog.objects.create(
-        reservation=reservation,
-        user=request.user,
-        action='cancelled',
-        timestamp=timezone.now()
+        return JsonResponse({'ok': False, 'error': 'No active reservation to check in to.'}, status=404)
+    if reservation.checked_in_at:
+        return JsonResponse({'ok': True, 'message': f'Already checked in to seat {reservation.seat.code}.'})
+    if not check_in(reservation):
+        return JsonResponse({'ok': False, 'error': 'The check-in deadline has passed.'}, status=403)
+    return JsonResponse({'ok': True, 'message': f'Checked in to seat {reservation.seat.code}.'})
+
+
+
+@login_required
+@require_POST
+@idempotent
+@ratelimit('book')
+def join_waitlist_api(request):
+    """Queue the current user for a reserved seat; they get it automatically when it is released."""
+    seat_id, error = _seat_from_payload(request)
+    if error:
+        return error
+    seat = get_object_or_404(Seat, pk=seat_id, is_active=True)
+    today = date.today()
+
+    if timezone.now() >= reservation_expiry(today, seat.zone):
+        return JsonResponse({'ok': False, 'error': 'Reservations for today are over.'}, status=403)
+    if Reservation.objects.filter(user=request.user, date=today, status='active').exists():
+        return JsonResponse({'ok': False, 'error': 'You already have an active reservation today.'}, status=403)
+    if not Reservation.objects.filter(seat=seat, date=today, status='active').exists():
+        return JsonResponse({'ok': False, 'error': 'Seat is free — book it instead.'}, status=409)
+
+    entry, _ = WaitlistEntry.objects.get_or_create(
+        seat=seat, date=today, user=request.user, status='waiting',
     )
+    return JsonResponse({
+        'ok': True,
+        'message': f'You are on the waitlist for seat {seat.code}.',
+        'position': queue_position(entry),
+    })
+
+
+@login_required
+@require_POST
+@idempotent
+@ratelimit('cancel')
+def leave_waitlist_api(request):
+    """Remove the current user from a seat's waitlist for today."""
+    seat_id, error = _seat_from_payload(request)
+    if error:
+        return error
+    left = WaitlistEntry.objects.filter(
+        seat_id=seat_id, date=date.today(), user=request.user, status='waiting',
+    ).update(status='left')
+    if not left:
+        return JsonResponse({'ok': False, 'error': 'You are not on this waitlist.'}, status=404)
+    return JsonResponse({'ok': True, 'message': 'Left the waitlist.'})
+
+@lru_cache(maxsize=None)
+def precache_manifest():
+    """
+    Hashed URLs of the static files the service worker precaches, plus a
+    version derived from them (hashed names change with file contents).
+    """
+    urls = [staticfiles_storage.url(name) for name in settings.SW_PRECACHE_ASSETS]
+    version = hashlib.sha256('\n'.join(urls).encode('utf-8')).hexdigest()[:12]
+    return version, urls
 
-    # 🔄 Mark reservation as cancelled instead of deleting
-    reservation.is_active = False
-    reservation.status = 'cancelled'   # assuming you have a status field like ('active', 'expired', 'cancelled')
-    reservation.save(update_fields=['is_active', 'status'])
 
-    return JsonResponse({'ok': True, 'message': 'Reservation cancelled successfully.'})
\ No newline at end of file
+def service_worker(request):
+    """Serve the service worker from the site root so its scope covers every page."""
+    version, urls = precache_manifest()
+    context = {
+        'version': version,
+        'precache': json.dumps(urls),
+        'static_url': settings.STATIC_URL,
+        'swr_paths': json.dumps([reverse('seats:index'), reverse('seats:seat_status_api')]),
+        'logout_path': reverse('logout'),
+    }
+    response = render(request, 'sw.js', context, content_type='application/javascript')
+    # Browsers must always revalidate the worker script to pick up new versions.
+    response['Cache-Control'] = 'no-cache'
+    response['Service-Worker-Allowed'] = '/'
+    return response
@@ -0,0 +1,74 @@
+"""
+Per-seat, per-day waitlist.
+
+Instead of polling /api/status/ until a seat frees up, a user joins the
+seat's queue. Whoever releases the seat (cancel, expiry) calls
+promote_next() inside their own transaction, which books the seat for the
+oldest waiting user and logs it: one write at release time.
+"""
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .checkin import checkin_deadline, track
+from .models import Reservation, ReservationLog, WaitlistEntry
+from .notifications import enqueue
+from .policy import reservation_expiry
+
+
+def queue_position(entry):
+    """1-based position of a waiting entry in its seat/day queue."""
+    ahead = Q(created_at__lt=entry.created_at) | Q(created_at=entry.created_at, id__lte=entry.id)
+    return WaitlistEntry.objects.filter(ahead, seat_id=entry.seat_id, date=entry.date, status='waiting').count()
+
+
+def _head(seat, day):
+    queue = WaitlistEntry.objects.filter(seat=seat, date=day, status='waiting').order_by('created_at', 'id')
+    if connection.features.has_select_for_update_skip_locked:
+        # Two releases of the same seat can't both promote the same waiter.
+        queue = queue.select_for_update(skip_locked=True, of=('self',))
+    return queue.select_related('user').first()
+
+
+def promote_next(seat, day, now=None):
+    """
+    Book `seat` on `day` for the oldest waiting user. Must run inside the
+    transaction that released the seat. Waiters who meanwhile got another
+    seat are skipped. Returns the new Reservation, or None.
+    """
+    now = now or timezone.now()
+    expires_at = reservation_expiry(day, seat.zone)
+    if now >= expires_at:
+        return None  # nothing left of the day to hand over
+
+    while True:
+        entry = _head(seat, day)
+        if entry is None:
+            return None
+
+        try:
+            with transaction.atomic():
+                reservation = Reservation.objects.create(
+                    user=entry.user,
+                    seat=seat,
+                    date=day,
+                    expires_at=expires_at,
+                    checkin_deadline=checkin_deadline(day, seat.zone, now),
+                    status='active',
+                    is_active=True,
+                )
+        except IntegrityError:
+            # The waiter already holds a seat that day (or the seat was re-booked).
+            if Reservation.objects.filter(seat=seat, date=day, status='active').exists():
+                return None
+            entry.status = 'skipped'
+            entry.save(update_fields=['status'])
+            continue
+
+        track(reservation)
+        entry.status = 'promoted'
+        entry.reservation = reservation
+        entry.save(update_fields=['status', 'reservation'])
+        ReservationLog.record(reservation, 'promoted', now)
+        enqueue(entry.user, 'promoted', reservation)
+        return reservation
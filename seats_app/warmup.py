@@ -0,0 +1,55 @@
+"""
+Warm-up run after a deploy so the first users don't pay for cold caches:
+lazy imports, URLconf/view imports, template compilation (through the cached
+loader) and the seat layout / occupancy caches.
+"""
+import importlib
+import threading
+import time
+from datetime import date
+
+from django.db import connection
+from django.template.loader import get_template
+from django.urls import get_resolver
+
+WARMUP_MODULES = ['pytz', 'seats_app.views', 'seats_app.admin']
+WARMUP_TEMPLATES = ['base.html', 'index.html', 'admin_map.html']
+
+
+def warm_up():
+    """Run every warm-up step; returns {step: seconds}."""
+    from .policy import get_policy
+    from .seat_cache import get_occupancy, get_seat_layout
+
+    timings = {}
+
+    def step(name, func):
+        start = time.perf_counter()
+        func()
+        timings[name] = round(time.perf_counter() - start, 4)
+
+    for module in WARMUP_MODULES:
+        step(f"import:{module}", lambda module=module: importlib.import_module(module))
+    # Resolving the URLconf imports every view module.
+    step('urlconf', lambda: get_resolver().url_patterns)
+    for name in WARMUP_TEMPLATES:
+        step(f"template:{name}", lambda name=name: get_template(name))
+    step('db:connect', connection.ensure_connection)
+    step('policy:compile', get_policy)
+    step('cache:layout', get_seat_layout)
+    step('cache:occupancy', lambda: get_occupancy(date.today()))
+    return timings
+
+
+def start_background_warm_up():
+    """Run warm_up() in a daemon thread; errors are reported, never raised."""
+    def run():
+        try:
+            timings = warm_up()
+            print(f"[Warmup] done in {sum(timings.values()):.3f}s")
+        except Exception as e:
+            print(f"[Warmup Error] {e}")
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,196 @@
+"""
+Floor-layout import.
+
+A layout file lists seats by code, as CSV (with a header row), JSON Lines, or a
+JSON array of objects:
+
+    code,row,col,x,y,zone,is_reservable
+    A1,A,1,120,60,North Wing,true
+
+Only `code` is required. Columns left out keep a seat's current value (or
+the model default for new seats). Files are read as a stream and written with
+bulk_create(update_conflicts=True) in chunks, upserting by code. Rows that
+match the database as-is are not written at all. Seats missing from the file
+are deactivated, never deleted, so their reservation history stays intact.
+"""
+import csv
+import json
+import os
+import sys
+from contextlib import contextmanager
+
+from django.db import transaction
+
+from seats_app.models import Seat
+from seats_app.seat_cache import invalidate_layout
+
+FIELDS = ('row', 'col', 'x', 'y', 'zone', 'is_reservable', 'is_active')
+TEXT_FIELDS = ('row', 'col', 'zone')
+TRUE = {'1', 'true', 'yes', 'y', 't'}
+FALSE = {'0', 'false', 'no', 'n', 'f'}
+
+
+class LayoutError(ValueError):
+    pass
+
+
+@contextmanager
+def _open(path):
+    if path == '-':
+        yield sys.stdin
+    else:
+        with open(path, newline='', encoding='utf-8-sig') as fh:
+            yield fh
+
+
+def _json_array(fh, block=1 << 16):
+    """Yield the elements of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    buf = fh.read(block).lstrip()
+    if not buf.startswith('['):
+        raise LayoutError("Expected a JSON array of seat objects")
+    buf = buf[1:]
+    eof = False
+    while True:
+        buf = buf.lstrip()
+        if buf.startswith(']'):
+            return
+        if buf.startswith(','):
+            buf = buf[1:]
+            continue
+        try:
+            item, end = decoder.raw_decode(buf)
+        except json.JSONDecodeError as e:
+            if eof:
+                raise LayoutError(f"Invalid JSON: {e}") from None
+            more = fh.read(block)
+            eof = not more
+            buf += more
+            continue
+        yield item
+        buf = buf[end:]
+
+
+def read_rows(path, fmt=None):
+    """Yield raw row dicts from a CSV, JSON Lines or JSON file ('-' reads stdin)."""
+    if fmt is None:
+        ext = os.path.splitext(path)[1].lower()
+        fmt = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.json': 'json'}.get(ext)
+        if fmt is None:
+            raise LayoutError(f"Can't tell the format of {path!r}; pass --format csv|jsonl|json")
+
+    with _open(path) as fh:
+        if fmt == 'csv':
+            yield from csv.DictReader(fh)
+        elif fmt == 'jsonl':
+            for number, line in enumerate(fh, start=1):
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError as e:
+                        raise LayoutError(f"line {number}: invalid JSON ({e})") from None
+        elif fmt == 'json':
+            yield from _json_array(fh)
+        else:
+            raise LayoutError(f"Unknown format {fmt!r}")
+
+
+def _bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE:
+        return True
+    if text in FALSE:
+        return False
+    raise ValueError(f"not a boolean: {value!r}")
+
+
+def clean_row(raw, number):
+    """Validate one raw row into {'code': ..., <given fields>}; raises LayoutError."""
+    if not isinstance(raw, dict):
+        raise LayoutError(f"row {number}: expected an object, got {type(raw).__name__}")
+    code = str(raw.get('code') or '').strip()
+    if not code:
+        raise LayoutError(f"row {number}: missing seat code")
+    seat = {'code': code}
+    try:
+        for field in TEXT_FIELDS:
+            if field in raw:
+                seat[field] = str(raw[field] or '').strip()
+        for field in ('x', 'y'):
+            if field in raw:
+                value = raw[field]
+                seat[field] = None if value in (None, '') else int(value)
+        if raw.get('is_reservable') not in (None, ''):
+            seat['is_reservable'] = _bool(raw['is_reservable'])
+    except (TypeError, ValueError) as e:
+        raise LayoutError(f"row {number} ({code}): {e}") from None
+    for field in ('code',) + TEXT_FIELDS:
+        limit = Seat._meta.get_field(field).max_length
+        if field in seat and len(seat[field]) > limit:
+            raise LayoutError(f"row {number} ({code}): {field} is longer than {limit} characters")
+    return seat
+
+
+def import_layout(rows, chunk_size=1000, deactivate_missing=True, dry_run=False):
+    """
+    Upsert seats from an iterable of raw rows. Returns a diff:
+    {'created': [codes], 'updated': [(code, {field: (old, new)})],
+     'unchanged': n, 'deactivated': [codes]}.
+    """
+    defaults = {field: Seat._meta.get_field(field).get_default() for field in FIELDS}
+    existing = {
+        seat['code']: seat for seat in Seat.objects.values('code', *FIELDS).iterator(chunk_size=chunk_size)
+    }
+    diff = {'created': [], 'updated': [], 'unchanged': 0, 'deactivated': []}
+    seen = set()
+    batch = []
+
+    def flush():
+        Seat.objects.bulk_create(
+            batch, update_conflicts=True, unique_fields=['code'], update_fields=list(FIELDS),
+        )
+        batch.clear()
+
+    with transaction.atomic():
+        for number, raw in enumerate(rows, start=1):
+            seat = clean_row(raw, number)
+            code = seat['code']
+            if code in seen:
+                raise LayoutError(f"row {number}: duplicate seat code {code!r}")
+            seen.add(code)
+
+            current = existing.get(code)
+            values = {**(current or defaults), 'is_active': True}
+            values.update((field, value) for field, value in seat.items() if field != 'code')
+            if current is None:
+                diff['created'].append(code)
+            else:
+                changes = {
+                    field: (current[field], values[field])
+                    for field in FIELDS if current[field] != values[field]
+                }
+                if not changes:
+                    diff['unchanged'] += 1
+                    continue
+                diff['updated'].append((code, changes))
+
+            batch.append(Seat(code=code, **{field: values[field] for field in FIELDS}))
+            if len(batch) >= chunk_size:
+                flush()
+        if batch:
+            flush()
+
+        if deactivate_missing:
+            missing = [code for code, seat in existing.items() if seat['is_active'] and code not in seen]
+            for start in range(0, len(missing), chunk_size):
+                Seat.objects.filter(code__in=missing[start:start + chunk_size]).update(is_active=False)
+            diff['deactivated'] = missing
+
+        if dry_run:
+            transaction.set_rollback(True)
+        else:
+            # bulk_create and update() send no post_save
+            transaction.on_commit(invalidate_layout)
+    return diff
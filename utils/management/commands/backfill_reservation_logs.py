@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from seats_app.replay import backfill
+
+
+class Command(BaseCommand):
+    help = "Fill in the seat and date of old reservation log rows and add missing events, so history can be replayed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Rows per UPDATE / INSERT (default 2000)")
+
+    def handle(self, *args, **options):
+        counts = backfill(chunk_size=options['chunk_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Filled in {counts['filled']} log rows, added {counts['created']} created "
+            f"and {counts['ended']} end events."
+        ))
+        if counts['unplaceable']:
+            self.stdout.write(self.style.WARNING(
+                f"{counts['unplaceable']} log rows have no seat or date and are left out of replays."
+            ))
@@ -0,0 +1,237 @@
+import json
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as dt_time, timedelta
+from unittest import mock
+
+import pytz
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import got_request_exception
+from django.db import OperationalError, connection, connections
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from seats_app.models import Reservation, Seat
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Recorder:
+    """Collects per-request samples from all worker threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.conflicts = 0
+        self.lock_errors = 0
+        self.server_errors = 0
+        self.booked = 0
+        # The test client's own exception capture is shared by every client,
+        # so remember the exception per thread instead.
+        self.local = threading.local()
+
+    def store_exception(self, **kwargs):
+        self.local.exc = sys.exc_info()[1]
+
+    def request(self, client, endpoint, method, path, **kwargs):
+        self.local.exc = None
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as captured:
+            response = getattr(client, method)(path, **kwargs)
+        elapsed = time.perf_counter() - start
+
+        exc = self.local.exc
+        with self.lock:
+            self.latencies[endpoint].append(elapsed)
+            self.queries[endpoint].append(len(captured))
+            self.statuses[endpoint][response.status_code] += 1
+            # SQLite "database is locked", PostgreSQL "deadlock detected" / lock timeouts
+            if isinstance(exc, OperationalError) and 'lock' in str(exc).lower():
+                self.lock_errors += 1
+            elif response.status_code >= 500 and not response.has_header('Retry-After'):
+                self.server_errors += 1
+        return response
+
+    def summary(self, wall):
+        endpoints = {}
+        total = 0
+        for endpoint, samples in self.latencies.items():
+            ordered = sorted(samples)
+            total += len(ordered)
+            endpoints[endpoint] = {
+                'requests': len(ordered),
+                'p50_ms': round(percentile(ordered, 50) * 1000, 2),
+                'p95_ms': round(percentile(ordered, 95) * 1000, 2),
+                'p99_ms': round(percentile(ordered, 99) * 1000, 2),
+                'max_ms': round(ordered[-1] * 1000, 2),
+                'queries_per_request': round(sum(self.queries[endpoint]) / len(ordered), 2),
+                'status_codes': dict(self.statuses[endpoint]),
+            }
+        return {
+            'wall_s': round(wall, 3),
+            'requests': total,
+            'throughput_rps': round(total / wall, 1) if wall else None,
+            'bookings': self.booked,
+            'conflicts': self.conflicts,
+            'lock_errors': self.lock_errors,
+            'server_errors': self.server_errors,
+            'endpoints': endpoints,
+        }
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate the 08:30 booking rush against a scratch database: N users poll the "
+        "seat map and race to book M seats. Prints throughput, latency percentiles, "
+        "conflicts, lock errors and queries per request as JSON. Runs on whatever "
+        "DB_ENGINE is configured, e.g. DB_ENGINE=postgres against a local PostgreSQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--seats', type=int, default=40)
+        parser.add_argument('--workers', type=int, default=16, help="Concurrent client threads")
+        parser.add_argument('--polls', type=int, default=3, help="Status polls per user before booking")
+        parser.add_argument('--retries', type=int, default=3, help="Booking attempts per user after a conflict")
+        parser.add_argument('--at', default='08:31', help="Injected local time of the rush (HH:MM)")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--ratelimit', action='store_true', help="Keep API rate limits enabled")
+        parser.add_argument('--output', help="Also write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        try:
+            hour, minute = (int(part) for part in options['at'].split(':'))
+            rush_time = dt_time(hour, minute)
+        except ValueError:
+            raise CommandError("--at must look like HH:MM")
+
+        if connection.vendor == 'sqlite' and not connection.settings_dict['TEST'].get('NAME'):
+            # A file, not SQLite's shared in-memory test DB: that one fails on
+            # contention immediately instead of honouring the busy timeout.
+            connection.settings_dict['TEST']['NAME'] = str(settings.BASE_DIR / 'bench_rush.sqlite3')
+        # Every cache alias gets a private in-memory cache for the run, so the
+        # scratch seats, reservations and rate-limit buckets never reach a
+        # cache shared with a live site.
+        bench_caches = {
+            alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'bench-rush-{alias}'}
+            for alias in settings.CACHES
+        }
+        with override_settings(CACHES=bench_caches):
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                report = self.run_rush(options, rush_time)
+            finally:
+                connections.close_all()
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output)
+        self.stdout.write(output)
+
+    def run_rush(self, options, rush_time):
+        rng = random.Random(options['seed'])
+        users = User.objects.bulk_create(
+            [User(username=f"rush{i:05d}") for i in range(options['users'])]
+        )
+        if not users[0].pk:
+            users = list(User.objects.filter(username__startswith='rush').order_by('id'))
+        Seat.objects.bulk_create([
+            Seat(code=f"S{i:04d}", x=(i % 20) * 60, y=(i // 20) * 60)
+            for i in range(options['seats'])
+        ])
+
+        # Clients are logged in up front so the rush measures only seat traffic.
+        clients = []
+        for user in users:
+            client = Client(raise_request_exception=False)
+            client.force_login(user)
+            clients.append((client, rng.random()))
+
+        tz = pytz.timezone(getattr(settings, 'BOOKING_TIME_ZONE', 'Asia/Karachi'))
+        injected = tz.localize(datetime.combine(date.today(), rush_time))
+        started = time.monotonic()
+
+        def fake_now():
+            # Injected wall clock that still moves forward during the run.
+            return injected + timedelta(seconds=time.monotonic() - started)
+
+        recorder = Recorder()
+        got_request_exception.connect(recorder.store_exception, dispatch_uid='bench-booking-rush')
+
+        def user_session(args):
+            client, user_seed = args
+            local_rng = random.Random(user_seed)
+            try:
+                recorder.request(client, 'index', 'get', '/')
+                available = []
+                for _ in range(max(1, options['polls'])):
+                    response = recorder.request(client, 'status', 'get', '/api/status/')
+                    if response.status_code == 200:
+                        available = [s['id'] for s in response.json()['seats'] if s['status'] == 'available']
+                for _ in range(options['retries'] + 1):
+                    if not available:
+                        return
+                    seat_id = local_rng.choice(available)
+                    response = recorder.request(
+                        client, 'book', 'post', '/api/book/',
+                        data=json.dumps({'seat_id': seat_id}), content_type='application/json',
+                    )
+                    if response.status_code == 200:
+                        with recorder.lock:
+                            recorder.booked += 1
+                        return
+                    # 503 + Retry-After: the seat is locked by a concurrent booking
+                    if response.status_code in (403, 409, 503):
+                        with recorder.lock:
+                            recorder.conflicts += 1
+                        available.remove(seat_id)
+                    else:
+                        return
+            finally:
+                connections.close_all()
+
+        overrides = {'ALLOWED_HOSTS': settings.ALLOWED_HOSTS + ['testserver']}
+        if not options['ratelimit']:
+            overrides['RATELIMIT_ENABLED'] = False
+
+        with override_settings(**overrides), mock.patch('django.utils.timezone.now', fake_now):
+            wall_start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                list(pool.map(user_session, clients))
+            wall = time.perf_counter() - wall_start
+        got_request_exception.disconnect(dispatch_uid='bench-booking-rush')
+
+        report = recorder.summary(wall)
+        report['config'] = {
+            'users': options['users'],
+            'seats': options['seats'],
+            'workers': options['workers'],
+            'polls': options['polls'],
+            'retries': options['retries'],
+            'at': options['at'],
+            'seed': options['seed'],
+            'database': connection.vendor,
+        }
+        # Integrity check: no seat may end up with two active reservations.
+        report['double_bookings'] = (
+            Reservation.objects.filter(status='active')
+            .values('seat_id', 'date').annotate(n=Count('id')).filter(n__gt=1).count()
+        )
+        return report
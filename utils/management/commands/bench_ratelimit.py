@@ -0,0 +1,57 @@
+import json
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from seats_app import ratelimit
+
+
+class Command(BaseCommand):
+    help = "Measure the per-request overhead of the seat API rate limiter for each backend."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100_000)
+        parser.add_argument('--clients', type=int, default=500, help="Distinct client IPs to spread calls over")
+        parser.add_argument('--scope', default='status')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        clients = options['clients']
+        scope = options['scope']
+
+        factory = RequestFactory()
+        requests = []
+        for i in range(clients):
+            request = factory.get('/api/status/', REMOTE_ADDR=f"10.0.{i // 256}.{i % 256}")
+            request.user = AnonymousUser()
+            requests.append(request)
+
+        # Huge limits so every call takes the full "allowed" path.
+        limits = {scope: {'ip': f'{iterations * 10}/s'}}
+        results = {}
+        for name in ('LocalBackend', 'CacheBackend'):
+            with override_settings(
+                RATELIMITS=limits,
+                RATELIMIT_BACKEND=f'seats_app.ratelimit.{name}',
+            ):
+                ratelimit._backend = None
+                backend = ratelimit.get_backend()
+                backend.reset()
+
+                start = time.perf_counter()
+                for i in range(iterations):
+                    ratelimit.check(requests[i % clients], scope)
+                elapsed = time.perf_counter() - start
+
+                backend.reset()
+                results[name] = {
+                    'iterations': iterations,
+                    'total_s': round(elapsed, 4),
+                    'per_check_us': round(elapsed / iterations * 1e6, 3),
+                }
+        ratelimit._backend = None
+
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,130 @@
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.contrib.auth.models import Group, Permission, User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+SOURCE_ALIAS = 'sqlite_source'
+
+
+# Rows pointing at a Permission, whose ids differ between the two databases
+PERMISSION_LINKS = (Group.permissions.through, User.user_permissions.through)
+
+
+def models_to_copy():
+    """
+    Models in foreign-key order. Permissions and content types are recreated by
+    migrate, so the user/group permission links come after them (see permission_map()).
+    """
+    models = [Group, User, User.groups.through, *PERMISSION_LINKS]
+    seats_app = apps.get_app_config('seats_app')
+    pending = list(seats_app.get_models())
+    # Parents first: repeatedly take models whose FK targets are already queued.
+    while pending:
+        for model in pending:
+            targets = {
+                field.related_model for field in model._meta.concrete_fields
+                if field.is_relation and field.related_model is not model
+            }
+            if all(target in models or target._meta.app_label != 'seats_app' for target in targets):
+                models.append(model)
+                pending.remove(model)
+                break
+        else:
+            raise CommandError(f"Circular foreign keys between {pending}")
+    return models
+
+
+def permission_map():
+    """Source Permission id -> target id, matched on (app_label, model, codename)."""
+    def by_natural_key(alias):
+        rows = Permission.objects.using(alias).values_list(
+            'pk', 'content_type__app_label', 'content_type__model', 'codename',
+        )
+        return {(app_label, model, codename): pk for pk, app_label, model, codename in rows}
+
+    target = by_natural_key(DEFAULT_DB_ALIAS)
+    return {pk: target.get(key) for key, pk in by_natural_key(SOURCE_ALIAS).items()}
+
+
+@contextmanager
+def keep_auto_timestamps(models):
+    """Stop auto_now/auto_now_add fields from overwriting the copied values."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy users, seats, reservations and logs from the SQLite database "
+        "(settings.SQLITE_PATH) into the default database, e.g. PostgreSQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument(
+            '--no-migrate-source', action='store_true',
+            help="Don't bring the SQLite file up to the current schema first",
+        )
+
+    def handle(self, *args, **options):
+        if SOURCE_ALIAS not in connections.databases:
+            raise CommandError("No 'sqlite_source' database configured; run with DB_ENGINE=postgres.")
+        if connections[DEFAULT_DB_ALIAS].vendor == 'sqlite':
+            raise CommandError("The default database is SQLite already; nothing to copy.")
+
+        if not options['no_migrate_source']:
+            call_command('migrate', database=SOURCE_ALIAS, verbosity=0)
+        call_command('migrate', database=DEFAULT_DB_ALIAS, verbosity=0)
+
+        models = models_to_copy()
+        for model in models:
+            if model.objects.using(DEFAULT_DB_ALIAS).exists():
+                raise CommandError(
+                    f"{model._meta.label} already has rows in the target database; "
+                    "copy into an empty database."
+                )
+
+        chunk_size = options['chunk_size']
+        permissions = permission_map()
+        with transaction.atomic(using=DEFAULT_DB_ALIAS), keep_auto_timestamps(models):
+            for model in models:
+                copied = 0
+                batch = []
+                rows = model.objects.using(SOURCE_ALIAS).order_by('pk').iterator(chunk_size=chunk_size)
+                for obj in rows:
+                    if model in PERMISSION_LINKS:
+                        obj.permission_id = permissions.get(obj.permission_id)
+                        if obj.permission_id is None:
+                            self.stderr.write(f"Skipping {model._meta.label} row {obj.pk}: permission not in target")
+                            continue
+                    batch.append(obj)
+                    if len(batch) >= chunk_size:
+                        model.objects.using(DEFAULT_DB_ALIAS).bulk_create(batch)
+                        copied += len(batch)
+                        batch = []
+                if batch:
+                    model.objects.using(DEFAULT_DB_ALIAS).bulk_create(batch)
+                    copied += len(batch)
+                self.stdout.write(f"{model._meta.label:<32} {copied:>10} rows")
+
+            # Primary keys were copied as-is; move the sequences past them.
+            connection = connections[DEFAULT_DB_ALIAS]
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                    cursor.execute(sql)
+
+        self.stdout.write(self.style.SUCCESS("✅ Copied SQLite data into the default database."))
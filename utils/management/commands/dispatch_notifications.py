@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from seats_app.notifications import dispatch
+
+
+class Command(BaseCommand):
+    help = "Send queued notification emails in batches over one mail connection, retrying failures with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help="Default: settings.NOTIFICATION_BATCH_SIZE")
+        parser.add_argument('--max-batches', type=int, help="Stop after this many batches")
+
+    def handle(self, *args, **options):
+        counts = dispatch(batch_size=options['batch_size'], max_batches=options['max_batches'])
+
+        if not any(counts.values()):
+            self.stdout.write("No notifications due.")
+            return
+
+        style = self.style.SUCCESS if not counts['failed'] else self.style.WARNING
+        self.stdout.write(style(
+            f"✅ Sent {counts['sent']} notifications "
+            f"({counts['retry']} to retry, {counts['failed']} given up)."
+        ))
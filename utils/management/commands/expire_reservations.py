@@ -1,7 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from seats_app.models import Reservation, ReservationLog
-import pytz
+from seats_app.models import Reservation
 
 
 class Command(BaseCommand):
@@ -9,35 +8,22 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
 
-        pk_tz = pytz.timezone('Asia/Karachi')
-
-        # naive DB field assumed to be PK time
-        local_now = timezone.localtime(timezone.now(), pk_tz)
-        expired_reservations = Reservation.objects.filter(is_active=True, expires_at__lte=local_now)
-        print(local_now)
-        print(expired_reservations)
-
+        now = timezone.now()
+        expired_reservations = (
+            Reservation.objects.filter(is_active=True, expires_at__lte=now)
+            .select_related('seat', 'user')
+        )
 
-        total_expired = expired_reservations.count()
+        total_expired = 0
+        for reservation in expired_reservations:
+            # Marks it expired, logs it and promotes the seat's next waiter
+            reservation.expire()
+            total_expired += 1
 
         if not total_expired:
             self.stdout.write(self.style.WARNING("No expired reservations found."))
             return
 
-        for reservation in expired_reservations:
-            # Update reservation status
-            reservation.is_active = False
-            reservation.save(update_fields=["is_active"])
-
-            # Log expiration event
-            ReservationLog.objects.create(
-                reservation=reservation,
-                action="expired",
-                is_active = False,
-                timestamp=timezone.now()
-            )
-
         self.stdout.write(
             self.style.SUCCESS(f"✅ Successfully expired and logged {total_expired} reservations.")
         )
-
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from seats_app import export
+
+
+class Command(BaseCommand):
+    help = "Stream reservations or audit logs to CSV or JSON Lines (memory use does not grow with the row count)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(export.EXPORTS))
+        parser.add_argument('--format', choices=sorted(export.FORMATS), default='csv')
+        parser.add_argument('--start', help="First date, YYYY-MM-DD (inclusive)")
+        parser.add_argument('--end', help="Last date, YYYY-MM-DD (inclusive)")
+        parser.add_argument('--user', help="Username")
+        parser.add_argument('--seat', help="Seat code")
+        parser.add_argument('--output', '-o', default='-', help="File to write; default stdout")
+        parser.add_argument('--chunk-size', type=int, default=export.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            filters = export.parse_filters(options)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        chunks = export.stream(options['kind'], filters, options['format'], options['chunk_size'])
+        if options['output'] == '-':
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+
+        with open(options['output'], 'w', newline='', encoding='utf-8') as fh:
+            for chunk in chunks:
+                fh.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f"✅ Wrote {options['kind']} export to {options['output']}"))
@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.layout import LayoutError, import_layout, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a floor layout from CSV, JSON Lines or a JSON array, upserting seats by code. "
+        "Seats missing from the file are deactivated, not deleted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Layout file, or - for stdin (needs --format)")
+        parser.add_argument('--format', choices=['csv', 'jsonl', 'json'], help="Default: from the file extension")
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--keep-missing', action='store_true', help="Don't deactivate seats missing from the file")
+        parser.add_argument('--dry-run', action='store_true', help="Show the diff without saving anything")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            diff = import_layout(
+                read_rows(options['path'], options['format']),
+                chunk_size=options['chunk_size'],
+                deactivate_missing=not options['keep_missing'],
+                dry_run=options['dry_run'],
+            )
+        except (LayoutError, OSError) as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - start
+
+        self.print_diff(diff, show_all=options['verbosity'] >= 2)
+        summary = (
+            f"{len(diff['created'])} created, {len(diff['updated'])} updated, "
+            f"{diff['unchanged']} unchanged, {len(diff['deactivated'])} deactivated in {elapsed:.1f}s"
+        )
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"Dry run, nothing saved: {summary}."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ Imported layout: {summary}."))
+
+    def print_diff(self, diff, show_all=False, limit=10):
+        """List changed seats (the first `limit` per kind unless show_all)."""
+        def shown(items):
+            return items if show_all else items[:limit]
+
+        def more(items):
+            if not show_all and len(items) > limit:
+                self.stdout.write(f"  … and {len(items) - limit} more (use -v 2 to list all)")
+
+        for code in shown(diff['created']):
+            self.stdout.write(self.style.SUCCESS(f"+ {code}"))
+        more(diff['created'])
+        for code, changes in shown(diff['updated']):
+            details = ", ".join(f"{field}: {old!r} → {new!r}" for field, (old, new) in changes.items())
+            self.stdout.write(f"~ {code} ({details})")
+        more(diff['updated'])
+        for code in shown(diff['deactivated']):
+            self.stdout.write(self.style.WARNING(f"- {code}"))
+        more(diff['deactivated'])
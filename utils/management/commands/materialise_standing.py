@@ -0,0 +1,35 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from seats_app.standing import materialise
+
+
+class Command(BaseCommand):
+    help = "Create the coming days' reservations for standing (recurring) bookings in one bulk insert."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help="First date (YYYY-MM-DD); default tomorrow")
+        parser.add_argument(
+            '--days', type=int,
+            help="Number of days to fill; default settings.STANDING_RESERVATION_DAYS_AHEAD",
+        )
+
+    def handle(self, *args, **options):
+        start = None
+        if options['start']:
+            try:
+                start = date.fromisoformat(options['start'])
+            except ValueError:
+                raise CommandError(f"Invalid --start date {options['start']!r}, expected YYYY-MM-DD")
+
+        counts = materialise(start=start, days=options['days'])
+
+        if not counts['created'] and not counts['skipped']:
+            self.stdout.write(self.style.WARNING("No standing reservations to materialise."))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Created {counts['created']} reservations from standing bookings "
+            f"({counts['skipped']} dates skipped because of conflicts)."
+        ))
@@ -0,0 +1,105 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter with -X importtime, so nothing is preloaded.
+# Wraps every AppConfig.ready() to time it, then prints the timings as JSON
+# on stdout (the import timings go to stderr).
+PROBE = r"""
+import json, os, sys, time
+t0 = time.perf_counter()
+import django
+from django.apps import config as app_config
+
+ready_times = {}
+_create = app_config.AppConfig.create.__func__
+
+def create(cls, entry):
+    app = _create(cls, entry)
+    ready = app.ready
+    def timed_ready():
+        start = time.perf_counter()
+        ready()
+        ready_times[app.label] = time.perf_counter() - start
+    app.ready = timed_ready
+    return app
+
+app_config.AppConfig.create = classmethod(create)
+t1 = time.perf_counter()
+django.setup()
+t2 = time.perf_counter()
+warmup = {}
+if os.environ.get("PROFILE_STARTUP_WARMUP") == "1":
+    from seats_app.warmup import warm_up
+    warmup = warm_up()
+t3 = time.perf_counter()
+print(json.dumps({
+    "import_django_s": t1 - t0,
+    "setup_s": t2 - t1,
+    "warmup_s": t3 - t2,
+    "ready_s": ready_times,
+    "warmup_steps_s": warmup,
+}))
+"""
+
+
+def parse_importtime(stderr):
+    """Parse `-X importtime` lines into {module: (self_us, cumulative_us)}."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            modules[name.strip()] = (int(self_us), int(cumulative_us))
+        except ValueError:
+            continue
+    return modules
+
+
+class Command(BaseCommand):
+    help = "Profile cold start: import time per module and AppConfig.ready() time per app."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=25, help="Show the N slowest modules")
+        parser.add_argument('--warmup', action='store_true', help="Also time the seats_app warm-up")
+        parser.add_argument('--json', action='store_true', help="Print the full report as JSON")
+
+    def handle(self, *args, **options):
+        env = dict(os.environ)
+        env['DJANGO_SETTINGS_MODULE'] = os.environ.get('DJANGO_SETTINGS_MODULE', 'seat_reservation_project.settings')
+        env['PROFILE_STARTUP_WARMUP'] = '1' if options['warmup'] else '0'
+        env.pop('RUN_MAIN', None)
+
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROBE],
+            cwd=str(settings.BASE_DIR), env=env, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise CommandError(f"Startup probe failed:\n{proc.stderr[-2000:]}")
+
+        report = json.loads(proc.stdout.strip().splitlines()[-1])
+        modules = parse_importtime(proc.stderr)
+        slowest = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)[:options['top']]
+        report['imports_us'] = {name: {'self': s, 'cumulative': c} for name, (s, c) in slowest}
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"import django      {report['import_django_s'] * 1000:8.1f} ms")
+        self.stdout.write(f"django.setup()     {report['setup_s'] * 1000:8.1f} ms")
+        if options['warmup']:
+            self.stdout.write(f"warm-up            {report['warmup_s'] * 1000:8.1f} ms")
+
+        self.stdout.write("\nAppConfig.ready() per app:")
+        for label, seconds in sorted(report['ready_s'].items(), key=lambda item: -item[1]):
+            self.stdout.write(f"  {label:<28} {seconds * 1000:8.2f} ms")
+
+        self.stdout.write(f"\nSlowest {len(slowest)} imports (cumulative / self):")
+        for name, (self_us, cumulative_us) in slowest:
+            self.stdout.write(f"  {name:<48} {cumulative_us / 1000:8.1f} ms {self_us / 1000:8.1f} ms")
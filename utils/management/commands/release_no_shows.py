@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from seats_app.checkin import overdue, release_no_show
+
+
+class Command(BaseCommand):
+    help = (
+        "Release reservations whose check-in deadline has passed. Server processes do "
+        "this on their own; use this when no server is running (e.g. from cron)."
+    )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        released = sum(release_no_show(reservation_id, now) for reservation_id in overdue(now))
+
+        if not released:
+            self.stdout.write(self.style.WARNING("No overdue reservations found."))
+            return
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Released {released} reservations nobody checked in to."))
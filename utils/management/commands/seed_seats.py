@@ -1,12 +1,10 @@
 from django.core.management.base import BaseCommand
-from seats_app.models import Seat
+from utils.layout import import_layout
 
 class Command(BaseCommand):
-    help = "Seed initial office seat layout"
+    help = "Seed initial office seat layout (upserts by code; existing seats and history are kept)"
 
     def handle(self, *args, **options):
-        Seat.objects.all().delete()  # optional: clear existing
-
         seats_data = [
             # --- Top section (front) ---
             {"code": "T1", "x": 120, "y": 60},
@@ -67,6 +65,10 @@ class Command(BaseCommand):
             {"code": "S4", "x": 660, "y": 540},
         ]
 
-        Seat.objects.bulk_create([Seat(**seat) for seat in seats_data])
+        # Same path as `manage.py import_layout`; other seats are left alone
+        diff = import_layout(seats_data, deactivate_missing=False)
 
-        self.stdout.write(self.style.SUCCESS(f"✅ Seeded {len(seats_data)} seats successfully."))
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Seeded {len(seats_data)} seats successfully "
+            f"({len(diff['created'])} created, {len(diff['updated'])} updated)."
+        ))
@@ -0,0 +1,13 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from seats_app.notifications import enqueue_reminders
+
+
+class Command(BaseCommand):
+    help = "Queue today's 'booking opens soon' reminder for users without a seat (sent by dispatch_notifications)."
+
+    def handle(self, *args, **options):
+        queued = enqueue_reminders(date.today())
+        self.stdout.write(self.style.SUCCESS(f"✅ Queued reminders for {queued} users."))
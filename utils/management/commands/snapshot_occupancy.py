@@ -0,0 +1,32 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from seats_app.replay import snapshot_day, take_snapshots
+
+
+class Command(BaseCommand):
+    help = "Store seat occupancy snapshots for days with new reservation log events (used by point-in-time maps)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Snapshot only this day (YYYY-MM-DD), as of now")
+
+    def handle(self, *args, **options):
+        if options['date']:
+            try:
+                day = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError(f"Invalid --date {options['date']!r}, expected YYYY-MM-DD")
+            snapshot = snapshot_day(day, timezone.now())
+            snapshots = [snapshot] if snapshot else []
+        else:
+            snapshots = take_snapshots()
+
+        if not snapshots:
+            self.stdout.write("No new events to snapshot.")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Stored {len(snapshots)} occupancy snapshots "
+            f"({sum(snapshot.events for snapshot in snapshots)} events since the previous ones)."
+        ))
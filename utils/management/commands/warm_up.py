@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from seats_app.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = "Preload lazy imports, compiled templates and the seat layout/occupancy caches."
+
+    def handle(self, *args, **options):
+        timings = warm_up()
+        for step, seconds in timings.items():
+            self.stdout.write(f"{step:<32} {seconds * 1000:8.1f} ms")
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ Warm-up finished in {sum(timings.values()) * 1000:.1f} ms.")
+        )
@@ -1,29 +1,57 @@
 import threading
 import time
 from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
 from django.core.management import call_command
+from django.utils import timezone
+
+
+def next_daily_run(hour, minute, now=None):
+    """Next hour:minute in settings.BOOKING_TIME_ZONE after `now`, whatever the OS time zone."""
+    now = timezone.localtime(now or timezone.now(), ZoneInfo(settings.BOOKING_TIME_ZONE))
+    next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return next_run
+
 
-def start_daily_scheduler(hour=18, minute=0):
+def start_daily_scheduler(hour=18, minute=0, command="expire_reservations"):
     """
-    Run 'expire_reservation' every day at hour:minute (default 18:00 PKT).
+    Run a management command (default 'expire_reservations') every day at
+    hour:minute in the booking time zone (default 18:00 PKT).
     """
     def run_loop():
         while True:
-            now = datetime.now()
-            # Compute next run datetime
-            next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-            if next_run <= now:
-                next_run += timedelta(days=1)
-
-            sleep_seconds = (next_run - now).total_seconds()
-            print(f"[Scheduler] Next expire_reservations run at: {next_run}")
-            time.sleep(sleep_seconds)
+            next_run = next_daily_run(hour, minute)
+            # Timestamps, since aware datetimes in one zone subtract as wall time
+            sleep_seconds = next_run.timestamp() - time.time()
+            print(f"[Scheduler] Next {command} run at: {next_run}")
+            time.sleep(max(0, sleep_seconds))
 
             try:
-                print(f"[{datetime.now()}] Running expire_reservations...")
-                call_command("expire_reservations")
+                print(f"[{datetime.now()}] Running {command}...")
+                call_command(command)
             except Exception as e:
                 print(f"[Scheduler Error] {e}")
 
     thread = threading.Thread(target=run_loop, daemon=True)
     thread.start()
+
+
+def start_interval_scheduler(seconds, command):
+    """
+    Run a management command every `seconds` seconds (e.g. dispatch_notifications).
+    """
+    def run_loop():
+        print(f"[Scheduler] Running {command} every {seconds}s")
+        while True:
+            time.sleep(seconds)
+            try:
+                call_command(command, verbosity=0)
+            except Exception as e:
+                print(f"[Scheduler Error] {command}: {e}")
+
+    thread = threading.Thread(target=run_loop, daemon=True)
+    thread.start()
@@ -0,0 +1,101 @@
+"""
+Synthetic large-data generator for performance tests and local benchmarking.
+
+Everything is derived from one random seed, so the same arguments always
+produce the same seats, users and reservation history. Rows are written with
+bulk_create in chunks, so years of history take seconds instead of hours.
+"""
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+
+from seats_app.models import Reservation, ReservationLog, Seat
+from seats_app.policy import reservation_expiry, reservation_start
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def generate(seats=2000, users=500, days=365, occupancy=0.6, cancel_rate=0.05,
+             seed=0, end=None, chunk_size=5000, prefix='synth'):
+    """
+    Create `seats` seats, `users` users and `days` days of reservation history
+    ending at `end` (default today; today's reservations stay active).
+    Returns a dict of row counts.
+    """
+    rng = random.Random(seed)
+    end = end or date.today()
+    columns = max(1, int(seats ** 0.5))
+
+    with transaction.atomic():
+        Seat.objects.bulk_create(
+            [
+                Seat(
+                    code=f"{prefix}-{i:05d}",
+                    row=str(i // columns),
+                    col=str(i % columns),
+                    x=(i % columns) * 60,
+                    y=(i // columns) * 60,
+                    zone=f"Z{i % 4}",
+                )
+                for i in range(seats)
+            ],
+            batch_size=chunk_size,
+        )
+        User.objects.bulk_create(
+            [User(username=f"{prefix}{i:06d}", email=f"{prefix}{i:06d}@example.com") for i in range(users)],
+            batch_size=chunk_size,
+        )
+
+    seat_rows = list(Seat.objects.filter(code__startswith=f"{prefix}-").order_by('code').values_list('id', 'code'))
+    user_ids = list(User.objects.filter(username__startswith=prefix).order_by('username').values_list('id', flat=True))
+    per_day = int(min(len(seat_rows), len(user_ids)) * occupancy)
+    returns_pks = connection.features.can_return_rows_from_bulk_insert
+
+    counts = {'seats': len(seat_rows), 'users': len(user_ids), 'reservations': 0, 'logs': 0}
+    pending = []
+    for offset in range(days - 1, -1, -1):
+        day = end - timedelta(days=offset)
+        expires_at = reservation_expiry(day)
+        starts = reservation_start(day)
+        is_today = day == end
+        for (seat_id, code), user_id in zip(rng.sample(seat_rows, per_day), rng.sample(user_ids, per_day)):
+            if is_today:
+                status = 'active'
+            else:
+                status = 'cancelled' if rng.random() < cancel_rate else 'expired'
+            pending.append((Reservation(
+                user_id=user_id, seat_id=seat_id, date=day, expires_at=expires_at,
+                status=status, is_active=is_today,
+            ), code, starts))
+        if len(pending) >= chunk_size or offset == 0:
+            _flush(pending, returns_pks, counts)
+            pending = []
+    return counts
+
+
+def _flush(pending, returns_pks, counts):
+    with transaction.atomic():
+        reservations = Reservation.objects.bulk_create([res for res, _, _ in pending])
+        now = timezone.now()
+        logs = []
+        for reservation, code, starts in pending:
+            # Timestamps within the day, so the history can be replayed (seats_app/replay.py)
+            fields = dict(
+                reservation=reservation if returns_pks else None, user_id=reservation.user_id,
+                seat_id=reservation.seat_id, seat_code=code, date=reservation.date,
+            )
+            logs.append(ReservationLog(action='created', timestamp=min(starts, now), **fields))
+            if reservation.status != 'active':
+                ended = reservation.expires_at
+                if reservation.status == 'cancelled':
+                    ended = starts + (ended - starts) / 2
+                logs.append(ReservationLog(action=reservation.status, timestamp=min(ended, now), **fields))
+        ReservationLog.objects.bulk_create(logs)
+    counts['reservations'] += len(reservations)
+    counts['logs'] += len(logs)
@@ -1,3 +1,107 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+from datetime import date, datetime, timezone as dt_timezone
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from seats_app.models import Reservation, ReservationLog, Seat
+from utils.layout import LayoutError, _json_array, import_layout
+from utils.scheduler import next_daily_run
+from utils.synthetic import generate
+
+
+class SyntheticGeneratorTests(TestCase):
+
+    def snapshot(self):
+        return list(Reservation.objects.order_by('date', 'seat__code').values_list('date', 'seat__code', 'user__username', 'status'))
+
+    def test_same_seed_gives_same_history(self):
+        end = date(2025, 1, 31)
+        counts = generate(seats=50, users=40, days=20, seed=7, end=end)
+        first = self.snapshot()
+        closed = Reservation.objects.exclude(status='active').count()
+        # one 'created' log per reservation, plus one per expiry/cancellation
+        self.assertEqual(counts['logs'], counts['reservations'] + closed)
+        Reservation.objects.all().delete()
+        ReservationLog.objects.all().delete()
+        Seat.objects.all().delete()
+        generate(seats=50, users=40, days=20, seed=7, end=end, prefix='again')
+        second = [(d, code.replace('again', 'synth'), user.replace('again', 'synth'), status)
+                  for d, code, user, status in self.snapshot()]
+
+        self.assertEqual(first, second)
+        self.assertEqual(counts['reservations'], 20 * int(40 * 0.6))
+        self.assertEqual(Reservation.objects.filter(status='active').values('date').distinct().count(), 1)
+
+
+class LayoutImportTests(TestCase):
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w', encoding='utf-8') as fh:
+            fh.write(content)
+        return path
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_reimport_upserts_and_deactivates_without_deleting(self):
+        call_command('import_layout', self.write('v1.csv', "code,x,y,zone\nA1,0,0,North\nA2,60,0,North\n"),
+                     stdout=io.StringIO())
+        a2 = Seat.objects.get(code='A2')
+        reservation = Reservation.objects.create(
+            user=User.objects.create_user('history'), seat=a2, date=date(2025, 1, 6),
+            expires_at='2025-01-06T13:00:00Z', status='expired', is_active=False,
+        )
+
+        out = io.StringIO()
+        call_command('import_layout', self.write('v2.jsonl', '{"code": "A1", "x": 10}\n{"code": "B1"}\n'), stdout=out)
+
+        self.assertIn("1 created, 1 updated, 0 unchanged, 1 deactivated", out.getvalue())
+        self.assertIn("x: 0 → 10", out.getvalue())
+        a1 = Seat.objects.get(code='A1')
+        self.assertEqual((a1.x, a1.y, a1.zone), (10, 0, 'North'))  # columns left out are kept
+        a2.refresh_from_db()
+        self.assertFalse(a2.is_active)
+        self.assertTrue(Reservation.objects.filter(pk=reservation.pk).exists())
+
+        # Same file again: nothing to write; the deactivated seat stays inactive
+        diff = import_layout([{'code': 'A1', 'x': 10}, {'code': 'B1'}])
+        self.assertEqual((diff['created'], diff['updated'], diff['unchanged'], diff['deactivated']), ([], [], 2, []))
+
+    def test_json_array_is_streamed(self):
+        seats = [{'code': f'S{i}', 'x': i, 'y': 0} for i in range(200)]
+        stream = io.StringIO(json.dumps(seats, indent=1))
+        self.assertEqual(list(_json_array(stream, block=64)), seats)
+
+    def test_bad_rows_roll_back(self):
+        with self.assertRaisesMessage(LayoutError, "row 2: duplicate seat code 'A1'"):
+            import_layout([{'code': 'A1'}, {'code': 'A1'}])
+        with self.assertRaisesMessage(LayoutError, "row 1 (A1)"):
+            import_layout([{'code': 'A1', 'x': 'left'}])
+        self.assertFalse(Seat.objects.exists())
+
+    def test_seed_seats_keeps_existing_seats(self):
+        Seat.objects.create(code='EXTRA')
+        call_command('seed_seats', stdout=io.StringIO())
+        call_command('seed_seats', stdout=io.StringIO())
+        self.assertTrue(Seat.objects.filter(code='EXTRA', is_active=True).exists())
+        self.assertEqual(Seat.objects.count(), 39)
+
+
+class SchedulerTests(TestCase):
+
+    @override_settings(BOOKING_TIME_ZONE='Asia/Karachi')
+    def test_daily_runs_use_booking_time_zone(self):
+        def utc(day, hour, minute):
+            return datetime(2025, 1, day, hour, minute, tzinfo=dt_timezone.utc)
+
+        # 03:00 UTC is 08:00 in Karachi (UTC+5), so 08:15 is still ahead today
+        self.assertEqual(next_daily_run(8, 15, utc(6, 3, 0)), utc(6, 3, 15))
+        # ...and once past, it is tomorrow's
+        self.assertEqual(next_daily_run(8, 15, utc(6, 3, 30)), utc(7, 3, 15))